@@ -1,7 +1,18 @@
-from . import view, mycontrols, state, yt_dlp_wrapper
-from .state import State, ReactiveState, Store, StateRefs
+import os
+
+from . import view, mycontrols, state, yt_dlp_wrapper, diskio, ingest
+from .state import (
+    State,
+    ReactiveState,
+    Store,
+    StateRefs,
+    Change,
+    CompiledGraph,
+    compile_graph,
+    StoreTemplate,
+)
 
 
 def main():
-    v = view.View()
+    v = view.View(output_dir=os.environ.get("YYDLP_GUI_OUTPUT_DIR"))
     v.run()
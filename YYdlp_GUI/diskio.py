@@ -0,0 +1,289 @@
+import ctypes
+import os
+import shutil
+import sys
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Protocol
+
+COALESCE_SIZE: int = 1 << 20  # 1 MiB
+ALIGNMENT: int = 4096
+SPACE_MARGIN: int = 64 << 20  # 64 MiB
+FALLOC_FL_KEEP_SIZE: int = 0x01
+
+
+class DiskSpaceError(Exception):
+    def __init__(self, target: Any | None, message: str = "") -> None:
+        self.message = message
+        self.target = target
+
+    def __str__(self) -> str:
+        return f"""
+Not enough free space on {self.target}.
+日本語:{self.target}の空き容量が足りません。
+additional message:
+{self.message}"""
+
+
+def device_of(path: str) -> int:
+    """return device id of path
+
+    If path does not exist yet, the nearest existing parent is used.
+    """
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return os.stat(path).st_dev
+
+
+def ensure_free_space(
+    path: str, required: int | None, margin: int = SPACE_MARGIN, reserved: int = 0
+) -> None:
+    """check free space before starting a job
+
+    Args:
+        reserved: bytes already held by other jobs on the device
+
+    Raises:
+        DiskSpaceError: if free space of the device of path minus reserved is
+                            smaller than required + margin, DiskSpaceError is raised.
+    """
+    if not required:
+        return
+    while not os.path.exists(path):
+        path = os.path.dirname(os.path.abspath(path))
+    free = shutil.disk_usage(path).free
+    if free - reserved < required + margin:
+        raise DiskSpaceError(
+            target=path,
+            message=(
+                f"required {required} bytes (+{margin} margin),"
+                f" but free is {free} bytes"
+                f" and {reserved} bytes of them are reserved by running jobs."
+            ),
+        )
+
+
+def _load_fallocate() -> Callable[..., int] | None:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        fallocate = getattr(libc, "fallocate64", None) or libc.fallocate
+    except (OSError, AttributeError):
+        return None
+    fallocate.argtypes = (ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64)
+    fallocate.restype = ctypes.c_int
+    return fallocate
+
+
+_fallocate: Callable[..., int] | None = _load_fallocate()
+
+
+def preallocate(file: BinaryIO, size: int, offset: int = 0) -> bool:
+    """reserve disk blocks of file from offset up to size bytes
+
+    The file size is kept (FALLOC_FL_KEEP_SIZE). posix_fallocate() would
+    grow the file, and yt-dlp would take an interrupted .part file
+    as fully downloaded on resume.
+
+    Returns:
+        bool: False if the platform or the filesystem does not support it.
+    """
+    if size <= offset or _fallocate is None:
+        return False
+    # e.g. EOPNOTSUPP on some network filesystems
+    return _fallocate(file.fileno(), FALLOC_FL_KEEP_SIZE, offset, size - offset) == 0
+
+
+class Writable(Protocol):
+    """binary stream which can be written, e.g. a file or CoalescingWriter"""
+
+    def write(self, data: bytes, /) -> int: ...
+
+    def flush(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+@dataclass
+class Reservation:
+    """free space held for one job until its bytes are written"""
+
+    device: int
+    remaining: int
+
+
+class DeviceLimiter:
+    """limit concurrent writers and hold free space per target device
+
+    Methods:
+        writer(device) -> ContextManager
+        acquire(path) -> ContextManager
+        reserve(path, required) -> ContextManager[Reservation]
+        hold(path, required) -> Reservation
+        consume(reservation, size)
+        release(reservation)
+    """
+
+    def __init__(self, max_writers: int = 2) -> None:
+        self.__max_writers: int = max_writers
+        self.__semaphores: dict[int, threading.BoundedSemaphore] = {}
+        self.__reserved: dict[int, int] = {}
+        self.__lock: threading.Lock = threading.Lock()
+
+    def __semaphore(self, device: int) -> threading.BoundedSemaphore:
+        with self.__lock:
+            semaphore = self.__semaphores.get(device)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.__max_writers)
+                self.__semaphores[device] = semaphore
+            return semaphore
+
+    @contextmanager
+    def writer(self, device: int) -> Iterator[None]:
+        """hold one writer slot of device"""
+        with self.__semaphore(device):
+            yield
+
+    def acquire(self, path: str) -> Any:
+        return self.writer(device_of(path))
+
+    def reserved(self, path: str) -> int:
+        """return bytes held by running jobs on the device of path"""
+        with self.__lock:
+            return self.__reserved.get(device_of(path), 0)
+
+    def hold(
+        self, path: str, required: int | None, margin: int = SPACE_MARGIN
+    ) -> Reservation:
+        """check free space minus space held by other jobs, and hold required
+
+        The space is held until it is consumed or released.
+
+        Raises:
+            DiskSpaceError: see ensure_free_space()
+        """
+        reservation = Reservation(device_of(path), required or 0)
+        self_reserved = self.__reserved  # faster
+        with self.__lock:
+            reserved = self_reserved.get(reservation.device, 0)
+            ensure_free_space(path, required, margin, reserved)
+            self_reserved[reservation.device] = reserved + reservation.remaining
+        return reservation
+
+    @contextmanager
+    def reserve(
+        self, path: str, required: int | None, margin: int = SPACE_MARGIN
+    ) -> Iterator[Reservation]:
+        """hold required in this context, see hold()"""
+        reservation = self.hold(path, required, margin)
+        try:
+            yield reservation
+        finally:
+            self.release(reservation)
+
+    def consume(self, reservation: Reservation, size: int) -> None:
+        """release size bytes of reservation, e.g. when they are on disk"""
+        with self.__lock:
+            size = min(size, reservation.remaining)
+            reservation.remaining -= size
+            self.__reserved[reservation.device] -= size
+
+    def release(self, reservation: Reservation) -> None:
+        """release what is left of reservation"""
+        self.consume(reservation, reservation.remaining)
+
+
+class CoalescingWriter:
+    """file writer which coalesces small writes into large aligned blocks
+
+    Blocks end on ALIGNMENT boundaries of the file, also when appending.
+    When size_hint is given, disk blocks up to it are preallocated
+    and blocks left past the end are released on close.
+    When limiter is given, each block is written holding a writer slot
+    of the device, and written bytes are consumed from reservation.
+
+    Args:
+        file: binary file to write. it is closed with the writer.
+        size_hint: expected size of the whole file
+        buffer_size: size of coalesced blocks
+        limiter: limiter of the device of file
+        reservation: free space held for file
+    """
+
+    def __init__(
+        self,
+        file: BinaryIO,
+        size_hint: int | None = None,
+        buffer_size: int = COALESCE_SIZE,
+        limiter: DeviceLimiter | None = None,
+        reservation: Reservation | None = None,
+    ) -> None:
+        self.__file: BinaryIO = file
+        self.__buffer_size: int = max(ALIGNMENT, buffer_size - buffer_size % ALIGNMENT)
+        self.__buffer: bytearray = bytearray()
+        self.__offset: int = file.tell()
+        self.__limiter: DeviceLimiter | None = limiter
+        self.__reservation: Reservation | None = reservation
+        self.__device: int | None = (
+            os.fstat(file.fileno()).st_dev if limiter is not None else None
+        )
+        self.__preallocated: bool = preallocate(file, size_hint or 0, self.__offset)
+
+    @property
+    def closed(self) -> bool:
+        return self.__file.closed
+
+    def write(self, data: bytes) -> int:
+        self_buffer = self.__buffer  # faster
+        self_buffer += data
+        if len(self_buffer) >= self.__buffer_size:
+            aligned = len(self_buffer) - (self.__offset + len(self_buffer)) % ALIGNMENT
+            self.__write_out(aligned)
+            del self_buffer[:aligned]
+        return len(data)
+
+    def __write_out(self, end: int) -> None:
+        if end <= 0:
+            return
+        offset = 0
+        limiter, device = self.__limiter, self.__device
+        slot = (
+            limiter.writer(device)
+            if limiter is not None and device is not None
+            else nullcontext()
+        )
+        with slot, memoryview(self.__buffer) as view:
+            while offset < end:
+                offset += self.__file.write(view[offset:end])
+        self.__offset += end
+        if limiter is not None and self.__reservation is not None:
+            limiter.consume(self.__reservation, end)
+
+    def flush(self) -> None:
+        if self.__buffer:
+            self.__write_out(len(self.__buffer))
+            self.__buffer.clear()
+        self.__file.flush()
+
+    def close(self) -> None:
+        if self.__file.closed:
+            return
+        try:
+            self.flush()
+            if self.__preallocated:
+                self.__file.truncate(self.__offset)
+        finally:
+            self.__file.close()
+
+    def __enter__(self) -> "CoalescingWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
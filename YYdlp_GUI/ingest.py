@@ -0,0 +1,236 @@
+import os
+import re
+import sys
+import threading
+import urllib.parse
+from collections.abc import Callable, Container, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any
+
+_TRACKING_PARAM = re.compile(r"utm_\w+|fbclid|gclid")
+# playback positions. other fragments can identify media, e.g. "#/watch?v=..."
+_POSITION_FRAGMENT = re.compile(r"(t|start)=[\w.:]*")
+_HOST_LIKE = re.compile(r"[\w-]+(\.[\w-]+)+(:\d+)?([/?#].*)?")
+_DEFAULT_PORTS: dict[str, int] = {"http": 80, "https": 443}
+
+
+def normalize_url(line: str) -> str | None:
+    """normalize one pasted line into url
+
+    surrounding spaces, quotes and <> are stripped, "https://" is added to
+    bare hosts, scheme and host are lowercased, default ports, playback
+    position fragments (#t=...) and tracking parameters (utm_*, fbclid, gclid)
+    are dropped. other fragments are kept.
+
+    Returns:
+        str | None: None if line is not http(s) url.
+    """
+    url = line.strip().strip("<>\"'")
+    if not url or url.startswith("#"):
+        return None
+    if "://" not in url:
+        if not _HOST_LIKE.fullmatch(url):
+            return None
+        url = "https://" + url
+    try:
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return None
+    scheme = parts.scheme.lower()
+    host = parts.hostname
+    if scheme not in _DEFAULT_PORTS or not host:
+        return None
+    netloc = f"[{host}]" if ":" in host else host
+    if port is not None and port != _DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    userinfo = parts.netloc.rpartition("@")[0]
+    if userinfo:
+        netloc = f"{userinfo}@{netloc}"
+    query = "&".join(
+        param
+        for param in parts.query.split("&")
+        if param and not _TRACKING_PARAM.fullmatch(param.split("=", 1)[0])
+    )
+    fragment = parts.fragment
+    if _POSITION_FRAGMENT.fullmatch(fragment):
+        fragment = ""
+    return urllib.parse.urlunsplit((scheme, netloc, parts.path, query, fragment))
+
+
+class ExtractorMatcher():
+    """find yt-dlp extractor of url by suitable() of each extractor
+
+    extractor classes are loaded on the first match, not on construction,
+    so that the UI thread does not import them.
+
+    Args:
+        allow_generic: if False, urls matched only by the generic extractor
+                        are treated as unsupported.
+    """
+
+    def __init__(self, allow_generic: bool = False) -> None:
+        self.allow_generic: bool = allow_generic
+        self.__classes: tuple[Any, ...] | None = None
+        self.__lock: threading.Lock = threading.Lock()
+
+    def __load(self) -> tuple[Any, ...]:
+        with self.__lock:
+            if self.__classes is None:
+                from yt_dlp.extractor import gen_extractor_classes
+
+                self.__classes = tuple(
+                    ie
+                    for ie in gen_extractor_classes()
+                    if self.allow_generic or ie.ie_key() != "Generic"
+                )
+            return self.__classes
+
+    def match(self, url: str) -> str | None:
+        """return ie_key of the first suitable extractor"""
+        classes = self.__classes if self.__classes is not None else self.__load()
+        for ie in classes:
+            if ie.suitable(url):
+                return ie.ie_key()
+        return None
+
+    def match_many(self, urls: list[str]) -> list[str | None]:
+        self_match = self.match  # faster
+        return [self_match(url) for url in urls]
+
+
+@dataclass
+class IngestResult:
+    """result of one batch, or totals of one ingestion when done is True
+
+    accepted holds (url, ie_key) of the matched extractor.
+    """
+
+    accepted: list[tuple[str, str]] = field(default_factory=list)
+    duplicates: int = 0
+    unsupported: int = 0
+    done: bool = False
+
+
+class UrlIngestor():
+    """bulk url ingestion pipeline
+
+    pasted or file-imported lines are streamed through stages
+    in batches off the UI thread:
+        normalize -> dedup against known and earlier urls
+        -> match extractor (in parallel) -> enqueue.
+    duplicates are dropped before matching, so each url is matched once.
+    on_batch is called after each batch from the pipeline thread.
+
+    Args:
+        enqueue: called with accepted (url, ie_key) of each batch,
+                    e.g. MediaDownLoad.download_many
+        known: urls already queued, e.g. MediaDownLoad or a history.
+                    if None, urls accepted by this ingestor are kept instead.
+        on_batch: called with IngestResult of each batch
+        batch_size: number of lines per batch
+        max_workers: number of threads to match extractors.
+                        matching is CPU-bound, so the default is cpu count
+                        on free-threaded Python and 1 otherwise.
+        allow_generic: see ExtractorMatcher
+        matcher: matcher used instead of ExtractorMatcher(allow_generic)
+    """
+
+    def __init__(
+        self,
+        enqueue: Callable[[list[tuple[str, str]]], Any],
+        known: Container[str] | None = None,
+        on_batch: Callable[[IngestResult], None] | None = None,
+        batch_size: int = 200,
+        max_workers: int | None = None,
+        allow_generic: bool = False,
+        matcher: ExtractorMatcher | None = None,
+    ) -> None:
+        self.__enqueue: Callable[[list[tuple[str, str]]], Any] = enqueue
+        self.__accepted: set[str] = set()
+        self.__known: Container[str] = known if known is not None else self.__accepted
+        self.__on_batch: Callable[[IngestResult], None] | None = on_batch
+        self.__batch_size: int = batch_size
+        self.__matcher: ExtractorMatcher = (
+            matcher if matcher is not None else ExtractorMatcher(allow_generic)
+        )
+        if max_workers is None:
+            # threads only add switching when the GIL serializes them
+            gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+            max_workers = 1 if gil_enabled else os.cpu_count() or 1
+        self.__max_workers: int = max_workers
+        # one pipeline thread keeps dedup state consistent between ingestions
+        self.__runner: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="UrlIngestor"
+        )
+        self.__matchers: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=self.__max_workers, thread_name_prefix="UrlIngestor_match"
+        )
+
+    def ingest(self, lines: Iterable[str]) -> Future:
+        """queue lines and return Future of total IngestResult"""
+        return self.__runner.submit(self.__run, lambda: iter(lines))
+
+    def ingest_text(self, text: str) -> Future:
+        return self.__runner.submit(self.__run, lambda: iter(text.splitlines()))
+
+    def ingest_file(self, path: str) -> Future:
+        def read() -> Iterator[str]:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                yield from f
+
+        return self.__runner.submit(self.__run, read)
+
+    def __run(self, open_lines: Callable[[], Iterator[str]]) -> IngestResult:
+        total = IngestResult(done=True)
+        lines = open_lines()
+        while batch := list(islice(lines, self.__batch_size)):
+            result = self.__process(batch)
+            total.accepted += result.accepted
+            total.duplicates += result.duplicates
+            total.unsupported += result.unsupported
+            if self.__on_batch is not None:
+                self.__on_batch(result)
+        return total
+
+    def __process(self, lines: list[str]) -> IngestResult:
+        result = IngestResult()
+        known = self.__known
+        # earlier batches are in known once enqueued
+        seen: set[str] = set()
+        unique: list[str] = []
+        for line in lines:
+            url = normalize_url(line)
+            if url is None:
+                if line.strip() and not line.lstrip().startswith("#"):
+                    result.unsupported += 1
+            elif url in seen or url in known:
+                result.duplicates += 1
+            else:
+                seen.add(url)
+                unique.append(url)
+        if not unique:
+            return result
+        if self.__max_workers == 1:
+            keys = self.__matcher.match_many(unique)
+        else:
+            size = -(-len(unique) // self.__max_workers)
+            chunks = [unique[i : i + size] for i in range(0, len(unique), size)]
+            matched = self.__matchers.map(self.__matcher.match_many, chunks)
+            keys = [key for chunk_keys in matched for key in chunk_keys]
+        for url, key in zip(unique, keys, strict=True):
+            if key is None:
+                result.unsupported += 1
+            else:
+                result.accepted.append((url, key))
+        if result.accepted:
+            if known is self.__accepted:
+                self.__accepted.update(url for url, _ in result.accepted)
+            self.__enqueue(result.accepted)
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.__runner.shutdown(wait=wait, cancel_futures=not wait)
+        self.__matchers.shutdown(wait=wait)
@@ -1,4 +1,7 @@
 from abc import ABCMeta, abstractmethod
+from collections import deque
+from collections.abc import Container, Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
 from typing import Any, Callable, Final, Generic, Literal, TypeAlias, TypeVar, Unpack
 
@@ -31,6 +34,19 @@ additional message:
 {self.message}"""
 
 
+class CycleError(Exception):
+    def __init__(self, target: Any | None, message: str = "") -> None:
+        self.message = message
+        self.target = target
+
+    def __str__(self) -> str:
+        return f"""
+{self.target} have cyclic reliances.
+日本語:{self.target}の依存関係が循環しています。
+additional message:
+{self.message}"""
+
+
 class IState(Generic[_T], metaclass=ABCMeta):
     """State Interface
 
@@ -174,7 +190,15 @@ class ReactiveState(IState, Generic[_T]):
         """return current value"""
         return self.__value
 
-    def __update(self) -> None:
+    def __update(self, *_: Any) -> None:
+        self.update()
+
+    def update(self) -> bool:
+        """recompute value and execute observers if value is changed
+
+        Returns:
+            bool: True if value is changed.
+        """
         # --original comment--
         # コンストラクタで渡された計算用の関数を再度呼び出し、値を更新する
         new_value = self.__formula(*(reliance.get() for reliance in self.__reliances ))
@@ -185,6 +209,24 @@ class ReactiveState(IState, Generic[_T]):
                 observer(new_value)
                 # --original comment--
                 # 変更時に各observerに通知する
+            return True
+        return False
+
+    def detach(self, *states: IState) -> None:
+        """stop updating on change of states
+
+        the owner (e.g. frozen Store) calls update() instead.
+        """
+        for state in states:
+            state.unbind(self.__update)
+
+    def attach(self, *states: IState) -> None:
+        """restart updating on change of states detached by detach()"""
+        for state in states:
+            state.bind(self.__update)
+
+    def is_observed(self) -> bool:
+        return bool(self.__observers)
 
     def bind(self, *observers: Callable[[_T], None]) -> None:
         """bind observer functions
@@ -226,8 +268,40 @@ class StoreKey:
     state: State | ReactiveState
 
 
+@dataclass(frozen=True, slots=True)
+class Change:
+    """one changed key of Store
+
+    key is a key path. keys of nested stores are joined by ".",
+    e.g. "job.progress".
+    """
+
+    key: str
+    old: Any
+    new: Any
+
+
+ChangeSetObserver: TypeAlias = Callable[[tuple[Change, ...]], None]
+
+
+def _select_changes(changes: tuple[Change, ...], prefix: str) -> tuple[Change, ...]:
+    """return changes under key path prefix
+
+    prefix matches whole "." separated segments,
+    e.g. "job1" selects "job1" and "job1.progress", but not "job10.progress".
+    """
+    if not prefix:
+        return changes
+    nested = prefix + "."
+    return tuple(
+        change
+        for change in changes
+        if change.key == prefix or change.key.startswith(nested)
+    )
+
+
 class IStore(metaclass=ABCMeta):
-    pass
+    __slots__ = ()
     ########################
     # ToDo!!!!!!!!!!!!!!!!!#
     ########################
@@ -255,6 +329,201 @@ ReactiveStateDataType: TypeAlias = tuple[
 ]
 
 
+@dataclass(frozen=True, slots=True)
+class CompiledGraph:
+    """dependency graph of States and ReactiveStates, compiled once
+
+    nodes are indexed: States first, then ReactiveStates in topological order.
+    every field is a flat tuple indexed by node.
+
+    Attributes:
+        keys: key of each node
+        index: node index of each key
+        state_count: number of States. nodes[:state_count] are States.
+        defaults: first value of each State. None for ReactiveStates.
+        formulas: formula of each ReactiveState. None for States.
+        reliances: node indexes given to each formula, in order.
+        live: False for ReactiveStates which have no observers
+                and no observed dependents (dead nodes).
+        fanout: live ReactiveStates reached from each node, in topological order.
+        refresh: dead ReactiveStates to recompute before reading each dead node,
+                    in topological order. empty for live nodes.
+    """
+
+    keys: tuple[str, ...]
+    index: dict[str, int]
+    state_count: int
+    defaults: tuple[Any, ...]
+    formulas: tuple[Callable[..., Any] | None, ...]
+    reliances: tuple[tuple[int, ...], ...]
+    live: tuple[bool, ...]
+    fanout: tuple[tuple[int, ...], ...]
+    refresh: tuple[tuple[int, ...], ...]
+
+
+def _check_keys(
+    states: tuple[StateDataType, ...],
+    reactives: tuple[ReactiveStateDataType, ...],
+) -> dict[str, ReactiveStateDataType]:
+    """check keys are unique and reliances exist, and return reactives by key"""
+    seen: set[str] = set()
+    for key in (*(data[0] for data in states), *(data[0] for data in reactives)):
+        if key in seen:
+            raise RedundancyError(
+                target=key, message=f"""key:"{key}" has already existed."""
+            )
+        seen.add(key)
+    reactive_data = {data[0]: data for data in reactives}
+    for data in reactives:
+        for reliance in data[2]:
+            if reliance not in seen:
+                raise KeyError(
+                    f"""State or ReactiveState of "{reliance}" is not found."""
+                )
+    return reactive_data
+
+
+def _sort_topologically(
+    reactive_data: dict[str, ReactiveStateDataType],
+    keys: list[str],
+    index: dict[str, int],
+) -> None:
+    """append ReactiveStates to keys and index in topological order (Kahn's)"""
+    waiting = {
+        key: sum(1 for reliance in data[2] if reliance in reactive_data)
+        for key, data in reactive_data.items()
+    }
+    dependents: dict[str, list[str]] = {key: [] for key in reactive_data}
+    for key, data in reactive_data.items():
+        for reliance in data[2]:
+            if reliance in reactive_data:
+                dependents[reliance].append(key)
+    ready = deque(key for key, count in waiting.items() if count == 0)
+    while ready:
+        key = ready.popleft()
+        index[key] = len(keys)
+        keys.append(key)
+        for dependent in dependents[key]:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                ready.append(dependent)
+    cyclic = tuple(key for key in reactive_data if key not in index)
+    if cyclic:
+        raise CycleError(
+            target=cyclic, message="ReactiveStates can't rely on each other."
+        )
+
+
+def _live_nodes(
+    keys: list[str],
+    children: list[list[int]],
+    state_count: int,
+    observed: Container[str] | None,
+) -> list[bool]:
+    """return whether each node is observed or has a live child"""
+    live = [True] * len(keys)
+    if observed is not None:
+        # reverse topological order: children are decided first
+        for i in range(len(keys) - 1, state_count - 1, -1):
+            live[i] = keys[i] in observed or any(live[child] for child in children[i])
+    return live
+
+
+def _fanout(children: list[list[int]], live: list[bool]) -> list[tuple[int, ...]]:
+    """return live nodes reached from each node, in topological order"""
+    fanout: list[tuple[int, ...]] = []
+    for i in range(len(children)):
+        reached: set[int] = set()
+        stack = list(children[i])
+        while stack:
+            child = stack.pop()
+            if child not in reached:
+                reached.add(child)
+                stack.extend(children[child])
+        fanout.append(tuple(sorted(child for child in reached if live[child])))
+    return fanout
+
+
+def _refresh(
+    reliances: tuple[tuple[int, ...], ...], live: list[bool]
+) -> list[tuple[int, ...]]:
+    """return dead nodes to recompute before reading each dead node"""
+    refresh: list[tuple[int, ...]] = []
+    for i in range(len(reliances)):
+        if live[i]:
+            refresh.append(())
+            continue
+        upstream: set[int] = set()
+        stack = [i]
+        while stack:
+            node = stack.pop()
+            if node not in upstream and not live[node]:
+                upstream.add(node)
+                stack.extend(reliances[node])
+        refresh.append(tuple(sorted(upstream)))
+    return refresh
+
+
+def compile_graph(
+    states: tuple[StateDataType, ...],
+    reactives: tuple[ReactiveStateDataType, ...],
+    observed: Container[str] | None = None,
+) -> CompiledGraph:
+    """build dependency graph once
+
+    only reliances in store (ReactiveStateDataType[2]) are part of the graph.
+
+    Args:
+        states: States of the graph
+        reactives: ReactiveStates of the graph. they can be given in any order.
+        observed: keys which have observers. None means all keys are observed.
+
+    Raises:
+        RedundancyError: if a key is given twice, RedundancyError is raised.
+        KeyError: if a reliance is not found, KeyError is raised.
+        CycleError: if reliances are cyclic, CycleError is raised.
+    """
+    reactive_data = _check_keys(states, reactives)
+    keys: list[str] = [data[0] for data in states]
+    index: dict[str, int] = {key: i for i, key in enumerate(keys)}
+    _sort_topologically(reactive_data, keys, index)
+
+    state_count = len(states)
+    size = len(keys)
+    defaults = (*(data[1] for data in states), *((None,) * (size - state_count)))
+    formulas = (
+        *((None,) * state_count),
+        *(reactive_data[key][1] for key in keys[state_count:]),
+    )
+    reliances = (
+        *(((),) * state_count),
+        *(
+            tuple(index[r] for r in reactive_data[key][2])
+            for key in keys[state_count:]
+        ),
+    )
+    children: list[list[int]] = [[] for _ in range(size)]
+    for i in range(state_count, size):
+        for r in reliances[i]:
+            children[r].append(i)
+
+    live = _live_nodes(keys, children, state_count, observed)
+    fanout = _fanout(children, live)
+    refresh = _refresh(reliances, live)
+
+    return CompiledGraph(
+        keys=tuple(keys),
+        index=index,
+        state_count=state_count,
+        defaults=defaults,
+        formulas=formulas,
+        reliances=reliances,
+        live=tuple(live),
+        fanout=tuple(fanout),
+        refresh=tuple(refresh),
+    )
+
+
 class Store(IStore):
     def __init__(
         self,
@@ -264,11 +533,25 @@ class Store(IStore):
         reactives: tuple[ReactiveStateDataType, ...] | None = None,
     ) -> None:
         # initialise object
-        self.__is_enabled_bind_self: bool = False
+        self.__is_tracking: bool = False
         self.__states: dict[str, State | ReactiveState] = {}
         self.__stores: dict[str, IStore] = {}
         self.__on_drops: set[Callable[[], None]] = set()
-        self.__observers: set[Callable[[], None]] = set()
+        self.__observers: set[Callable[[IStore], None]] = set()
+        # change-set
+        self.__subscribers: dict[ChangeSetObserver, str] = {}
+        self.__trackers: dict[str, Callable[[Any], None]] = {}
+        self.__relays: dict[str, ChangeSetObserver] = {}
+        self.__last_values: dict[str, Any] = {}
+        self.__pending: dict[str, Change] = {}
+        self.__batch_depth: int = 0
+        # compiled graph
+        self.__reactive_data: dict[str, ReactiveStateDataType] = {}
+        self.__graph: CompiledGraph | None = None
+        self.__nodes: tuple[State | ReactiveState, ...] = ()
+        self.__propagators: dict[str, Callable[[Any], None]] = {}
+        self.__propagating: bool = False
+        self.__propagate_queue: deque[int] = deque()
         # process arguments
         self.name: str = name
         if states is not None:
@@ -282,14 +565,209 @@ class Store(IStore):
         for observer in self.__observers:
             observer(self)
 
-    def __enable_bind_self(self):
-        self.__is_enabled_bind_self = True
-        for state in self.__states:
-            state.bind(lambda _: self.__call_observer())
-        for store in self.__stores:
-            store.bind(lambda _: self.__call_observer())
+    def __enable_tracking(self) -> None:
+        """start to record changes of states and nested stores
+
+        This is called lazily, when the first observer or subscriber is given.
+        """
+        self.__is_tracking = True
+        for key in self.__states:
+            self.__track(key)
+        for name in self.__stores:
+            self.__relay(name)
+
+    def __track(self, key: str) -> None:
+        self_last_values = self.__last_values  # faster
+
+        def tracker(new_value: Any) -> None:
+            self.__record(key, self_last_values[key], new_value)
+            self_last_values[key] = new_value
+
+        state = self.__states[key]
+        self_last_values[key] = state.get()
+        self.__trackers[key] = tracker
+        state.bind(tracker)
+
+    def __untrack(self, key: str) -> None:
+        tracker = self.__trackers.pop(key, None)
+        if tracker is not None:
+            self.__states[key].unbind(tracker)
+            del self.__last_values[key]
+
+    def __relay(self, name: str) -> None:
+        def relay(changes: tuple[Change, ...]) -> None:
+            with self.batch():
+                for change in changes:
+                    self.__record(f"{name}.{change.key}", change.old, change.new)
+
+        self.__relays[name] = relay
+        self.__stores[name].subscribe(relay)
+
+    def __record(self, key: str, old: Any, new: Any) -> None:
+        self_pending = self.__pending  # faster
+        if key in self_pending:
+            # coalesce: keep the first old value
+            old = self_pending[key].old
+        self_pending[key] = Change(key, old, new)
+        if self.__batch_depth == 0:
+            self.__flush()
+
+    def __flush(self) -> None:
+        if not self.__pending:
+            return
+        changes = tuple(
+            change for change in self.__pending.values() if change.old != change.new
+        )
+        self.__pending.clear()
+        if not changes:
+            return
+        for observer, prefix in tuple(self.__subscribers.items()):
+            selected = _select_changes(changes, prefix)
+            if selected:
+                observer(selected)
+        self.__call_observer()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """deliver changes made in this context as one change-set"""
+        self.__batch_depth += 1
+        try:
+            yield
+        finally:
+            self.__batch_depth -= 1
+            if self.__batch_depth == 0:
+                self.__flush()
+
+    def subscribe(self, observer: ChangeSetObserver, prefix: str = "") -> None:
+        """subscribe change-sets
+
+        observer receives tuple of Change. only changes whose key path
+        is prefix or under it are delivered, e.g. "job1" selects "job1.progress"
+        but not "job10.progress". if nothing matches, observer is not called.
+
+        Raises:
+            RedundancyError: if observer have already subscribed,
+                                RedudancyError is raised.
+        """
+        if observer in self.__subscribers:
+            raise RedundancyError(
+                target=observer, message="redudancy subscriber was given."
+            )
+        if self.__is_tracking is False:
+            self.__enable_tracking()
+            self.__refreeze()
+        self.__subscribers[observer] = prefix.rstrip(".")
+
+    def unsubscribe(self, *observers: ChangeSetObserver) -> None:
+        for observer in observers:
+            del self.__subscribers[observer]
+
+    def freeze(self) -> CompiledGraph:
+        """compile dependency graph of ReactiveStates in this store
+
+        After freezing, ReactiveStates no longer bind to States one by one.
+        A change is propagated by the store in precomputed topological order,
+        and ReactiveStates which nobody observes are left out of propagation
+        and recomputed only when they are read.
+        Adding or removing keys thaws the store. Binding refreezes it.
+
+        Raises:
+            CycleError: if reliances are cyclic, CycleError is raised.
+        """
+        if self.__graph is not None:
+            self.thaw()
+        self_states = self.__states  # faster
+        self_reactive_data = self.__reactive_data  # faster
+        for key, data in self_reactive_data.items():
+            self_states[key].detach(*(self_states[reliance] for reliance in data[2]))
+        graph = compile_graph(
+            states=tuple(
+                (key, state.get())
+                for key, state in self_states.items()
+                if isinstance(state, State)
+            ),
+            reactives=tuple(self_reactive_data.values()),
+            observed={
+                key
+                for key, state in self_states.items()
+                if isinstance(state, ReactiveState) and state.is_observed()
+            },
+        )
+        self.__graph = graph
+        self.__nodes = tuple(self_states[key] for key in graph.keys)
+        for i, key in enumerate(graph.keys):
+            if i < graph.state_count or self_reactive_data[key][3]:
+                # States, and ReactiveStates updated by states out of store
+                propagator = self.__propagator(i)
+                self.__propagators[key] = propagator
+                self_states[key].bind(propagator)
+        return graph
+
+    def thaw(self) -> None:
+        """undo freeze(). ReactiveStates bind to States again."""
+        graph = self.__graph
+        if graph is None:
+            return
+        self.__graph = None
+        self_states = self.__states  # faster
+        for key, propagator in self.__propagators.items():
+            self_states[key].unbind(propagator)
+        self.__propagators.clear()
+        self.__nodes = ()
+        for key in graph.keys[graph.state_count :]:
+            reactive = self_states[key]
+            reliances = self.__reactive_data[key][2]
+            reactive.attach(*(self_states[reliance] for reliance in reliances))
+            # dead nodes may be stale
+            reactive.update()
+
+    def __refreeze(self) -> None:
+        if self.__graph is not None:
+            self.freeze()
+
+    def __propagator(self, index: int) -> Callable[[Any], None]:
+        def propagator(_: Any) -> None:
+            self.__propagate(index)
+
+        return propagator
+
+    def __propagate(self, index: int) -> None:
+        self_queue = self.__propagate_queue  # faster
+        self_queue.append(index)
+        if self.__propagating:
+            # a change while propagating, e.g. from an observer
+            return
+        self.__propagating = True
+        graph = self.__graph
+        nodes = self.__nodes
+        fanout = graph.fanout
+        reliances = graph.reliances
+        try:
+            while self_queue:
+                origin = self_queue.popleft()
+                changed = {origin}
+                for node in fanout[origin]:
+                    for reliance in reliances[node]:
+                        if reliance in changed:
+                            if nodes[node].update():
+                                changed.add(node)
+                            break
+        finally:
+            self.__propagating = False
+            self_queue.clear()
+
+    def __get(self, key: str) -> Any:
+        graph = self.__graph
+        if graph is not None:
+            i = graph.index[key]
+            if not graph.live[i]:
+                nodes = self.__nodes
+                for node in graph.refresh[i]:
+                    nodes[node].update()
+        return self.__states[key].get()
 
     def state(self, *state_data: StateDataType) -> None:
+        self.thaw()
         self_states = self.__states  # faster
         for data in state_data:
             if data[0] in self_states:
@@ -298,13 +776,14 @@ class Store(IStore):
                 )
             else:
                 self_states[data[0]] = State(data[1])
-                if self.__is_enabled_bind_self:
-                    self_states[data[0]].bind(self.__call_observer)
+                if self.__is_tracking:
+                    self.__track(data[0])
 
     def state_keys(self, *keys: str) -> None:
         """add_state
         This method is equal `store_instance.state(("key",None),("key2",))`
         """
+        self.thaw()
         self_states = self.__states  # faster
         for key in keys:
             if key in self_states:
@@ -313,10 +792,11 @@ class Store(IStore):
                 )
             else:
                 self_states[key] = State(None)
-                if self.__is_enabled_bind_self:
-                    self_states[key].binf(self.__call_observer)
+                if self.__is_tracking:
+                    self.__track(key)
 
     def reactive(self, *reactive_state_data: ReactiveStateDataType) -> None:
+        self.thaw()
         self_states = self.__states  # faster
         for data in reactive_state_data:
             if data[0] in self_states:
@@ -326,8 +806,9 @@ class Store(IStore):
             else:
                 reliances_in_store = (self.__states[key] for key in data[2])
                 self_states[data[0]] = ReactiveState(data[1], (*reliances_in_store,*data[3]))
-                if self.__is_enabled_bind_self:
-                    self_states[data[0]].bind(self.__call_observer)
+                self.__reactive_data[data[0]] = data
+                if self.__is_tracking:
+                    self.__track(data[0])
 
     def store(
         self,
@@ -343,16 +824,34 @@ class Store(IStore):
             )
         else:
             self.__stores[name] = store
-            if self.__is_enabled_bind_self:
-                self.__stores[name].bind(self.__call_observer)
+            if self.__is_tracking:
+                self.__relay(name)
+        return store
+
+    def store_from(self, template: "StoreTemplate", name: str) -> IStore:
+        """add nested store instantiated from template"""
+        if name in self.__stores:
+            raise RedundancyError(
+                target=name, message=f"""Store of name:"{name}" has already existed."""
+            )
+        store = template.instantiate(name)
+        self.__stores[name] = store
+        if self.__is_tracking:
+            self.__relay(name)
         return store
 
     def remove(self, *keys: str) -> None:
+        self.thaw()
         for key in keys:
+            self.__untrack(key)
+            self.__reactive_data.pop(key, None)
             del self.__states[key]
 
     def drop_store(self, *names: str) -> None:
         for name in names:
+            relay = self.__relays.pop(name, None)
+            if relay is not None:
+                self.__stores[name].unsubscribe(relay)
             del self.__stores[name]
 
     def on_drop(
@@ -384,6 +883,7 @@ class Store(IStore):
                 self_states[key].bind(*observers)
             else:
                 raise KeyError(f"""State or ReactiveState of "{key}" is not found.""")
+        self.__refreeze()
 
     def bind_store(
         self, keys: tuple[str], observers: tuple[Callable[[IStore], None]]
@@ -394,8 +894,9 @@ class Store(IStore):
                 self_stores[key].bind(*observers)
 
     def bind(self, *observers: Callable[[IStore], None]) -> None:
-        if self.__is_enabled_bind_self is False:
-            self.__enable_bind_self()
+        if self.__is_tracking is False:
+            self.__enable_tracking()
+            self.__refreeze()
         prev_len = len(self.__observers)
         self.__observers.update(observers)
         if len(self.__observers) < prev_len + len(observers):
@@ -426,7 +927,7 @@ class Store(IStore):
         self_stores = self.__stores  # faster
         for key in keys:
             if key in self_stores:
-                self_stores[key].unbind_self(*observers)
+                self_stores[key].unbind_self(*(observers or ()))
             else:
                 raise KeyError(f"""State or ReactiveState of "{key}" is not found.""")
 
@@ -439,23 +940,28 @@ class Store(IStore):
                 self_observers.remove(observer)
 
     def set(self, keys: tuple[str], value: Any) -> None:
+        """set value to States of keys
+
+        changes caused by this call are delivered as one change-set.
+        """
         self_states = self.__states  # faster
-        for key in keys:
-            if key in self_states and isinstance(self_states[key], State):
-                self_states[key].set(value)
-            elif key not in self_states:
-                raise KeyError(key)
-            elif not isinstance(self_states[key], State):
-                raise TypeError(self_states[key])
+        with self.batch():
+            for key in keys:
+                if key in self_states and isinstance(self_states[key], State):
+                    self_states[key].set(value)
+                elif key not in self_states:
+                    raise KeyError(key)
+                elif not isinstance(self_states[key], State):
+                    raise TypeError(self_states[key])
 
     def get(self, key: str) -> Any:
-        return self.__states[key].get()
+        return self.__get(key)
 
     def gets(self, keys: tuple[str]) -> tuple[Any]:
-        return (self.__states[key].get() for key in keys)
+        return (self.__get(key) for key in keys)
 
     def get_dict(self, keys: tuple[str]) -> dict[str, Any]:
-        return {key: self.__states[key].get() for key in keys}
+        return {key: self.__get(key) for key in keys}
 
     def get_store(self, name: str) -> IStore:
         return self.__stores[name]
@@ -463,6 +969,317 @@ class Store(IStore):
     def refs(self, *keys: str) -> IStateRefs:
         return StateRefs(store=self, keys=keys)
 
+class StoreTemplate:
+    """schema of Store, compiled once and instantiated cheaply
+
+    the dependency graph, formulas and first values are shared by
+    all instances. each instance has only a list of values,
+    and observers are allocated when they are bound.
+
+    Args:
+        name: name of template
+        states: States of instances
+        state_keys: States of instances whose first value is None
+        reactives: ReactiveStates of instances. only reliances in store are allowed.
+        observed: keys which will be bound or subscribed. other ReactiveStates are
+                    computed only when they are read. None means all keys.
+
+    Raises:
+        EssentialError: if a ReactiveState relies on states out of store,
+                            EssentialError is raised.
+        CycleError: if reliances are cyclic, CycleError is raised.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        states: tuple[StateDataType, ...] | None = None,
+        state_keys: tuple[str] | None = None,
+        reactives: tuple[ReactiveStateDataType, ...] | None = None,
+        observed: Container[str] | None = None,
+    ) -> None:
+        reactives = reactives if reactives is not None else ()
+        for data in reactives:
+            if data[3]:
+                raise EssentialError(
+                    target=data[3],
+                    message=(
+                        f"""ReactiveState:"{data[0]}" of template"""
+                        " can rely only on keys in store."
+                    ),
+                )
+        self.name: str = name
+        self.graph: CompiledGraph = compile_graph(
+            states=(
+                *(states if states is not None else ()),
+                *(
+                    (key, None)
+                    for key in (state_keys if state_keys is not None else ())
+                ),
+            ),
+            reactives=reactives,
+            observed=observed,
+        )
+        graph = self.graph
+        values = list(graph.defaults)
+        for i in range(graph.state_count, len(values)):
+            values[i] = graph.formulas[i](*(values[r] for r in graph.reliances[i]))
+        self.initial_values: tuple[Any, ...] = tuple(values)
+
+    def instantiate(self, name: str) -> "TemplateStore":
+        return TemplateStore(self, name)
+
+
+class TemplateStore(IStore):
+    """Store instantiated from StoreTemplate
+
+    This has the same get/set/bind_states/bind/subscribe/batch/on_drop_self
+    methods as Store, but its keys are fixed by the template.
+    """
+
+    __slots__ = (
+        "__batch_depth",
+        "__observers",
+        "__on_drops",
+        "__pending",
+        "__store_observers",
+        "__subscribers",
+        "__values",
+        "name",
+        "template",
+    )
+
+    def __init__(self, template: StoreTemplate, name: str) -> None:
+        self.name: str = name
+        self.template: StoreTemplate = template
+        self.__values: list[Any] = list(template.initial_values)
+        self.__observers: dict[int, set[Callable[[Any], None]]] | None = None
+        self.__store_observers: set[Callable[[IStore], None]] | None = None
+        self.__subscribers: dict[ChangeSetObserver, str] | None = None
+        self.__pending: dict[str, Change] | None = None
+        self.__batch_depth: int = 0
+        self.__on_drops: set[Callable[[], None]] | None = None
+
+    def __index(self, key: str) -> int:
+        try:
+            return self.template.graph.index[key]
+        except KeyError:
+            raise KeyError(
+                f"""State or ReactiveState of "{key}" is not found."""
+            ) from None
+
+    def get(self, key: str) -> Any:
+        graph = self.template.graph
+        i = self.__index(key)
+        self_values = self.__values  # faster
+        if not graph.live[i]:
+            for node in graph.refresh[i]:
+                self_values[node] = graph.formulas[node](
+                    *(self_values[r] for r in graph.reliances[node])
+                )
+        return self_values[i]
+
+    def gets(self, keys: tuple[str]) -> tuple[Any]:
+        return (self.get(key) for key in keys)
+
+    def get_dict(self, keys: tuple[str]) -> dict[str, Any]:
+        return {key: self.get(key) for key in keys}
+
+    def set(self, keys: tuple[str], value: Any) -> None:
+        """set value to States of keys
+
+        changes caused by this call are delivered as one change-set.
+        """
+        graph = self.template.graph
+        self_values = self.__values  # faster
+        with self.batch():
+            for key in keys:
+                i = self.__index(key)
+                if i >= graph.state_count:
+                    raise TypeError(key)
+                old = self_values[i]
+                if old != value:
+                    self_values[i] = value
+                    self.__notify(i, old, value)
+                    self.__propagate(i)
+
+    def __propagate(self, origin: int) -> None:
+        graph = self.template.graph
+        formulas = graph.formulas
+        reliances = graph.reliances
+        self_values = self.__values  # faster
+        changed = {origin}
+        for node in graph.fanout[origin]:
+            node_reliances = reliances[node]
+            for reliance in node_reliances:
+                if reliance in changed:
+                    new = formulas[node](*(self_values[r] for r in node_reliances))
+                    old = self_values[node]
+                    if old != new:
+                        self_values[node] = new
+                        changed.add(node)
+                        self.__notify(node, old, new)
+                    break
+
+    def __notify(self, index: int, old: Any, new: Any) -> None:
+        if self.__observers is not None and index in self.__observers:
+            for observer in self.__observers[index]:
+                observer(new)
+        if self.__subscribers or self.__store_observers:
+            key = self.template.graph.keys[index]
+            self_pending = self.__pending  # faster
+            if key in self_pending:
+                old = self_pending[key].old
+            self_pending[key] = Change(key, old, new)
+            if self.__batch_depth == 0:
+                self.__flush()
+
+    def __flush(self) -> None:
+        if not self.__pending:
+            return
+        changes = tuple(
+            change for change in self.__pending.values() if change.old != change.new
+        )
+        self.__pending.clear()
+        if not changes:
+            return
+        for observer, prefix in tuple((self.__subscribers or {}).items()):
+            selected = _select_changes(changes, prefix)
+            if selected:
+                observer(selected)
+        for store_observer in tuple(self.__store_observers or ()):
+            store_observer(self)
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """deliver changes made in this context as one change-set"""
+        self.__batch_depth += 1
+        try:
+            yield
+        finally:
+            self.__batch_depth -= 1
+            if self.__batch_depth == 0:
+                self.__flush()
+
+    def __check_observed(self, i: int) -> None:
+        if not self.template.graph.live[i]:
+            key = self.template.graph.keys[i]
+            raise KeyError(
+                f"""ReactiveState of "{key}" is not observed in template."""
+            )
+
+    def bind_states(
+        self, keys: tuple[str], observers: tuple[Callable[[Any | None], None]]
+    ) -> None:
+        """bind observer functions
+
+        Raises:
+            RedundancyError: if observer given by arguments have already binded,
+                                RedudancyError is raised.
+            KeyError: if key is not observed in template, KeyError is raised.
+        """
+        if self.__observers is None:
+            self.__observers = {}
+        for key in keys:
+            i = self.__index(key)
+            self.__check_observed(i)
+            key_observers = self.__observers.setdefault(i, set())
+            prev_len = len(key_observers)
+            key_observers.update(observers)
+            if len(key_observers) < prev_len + len(observers):
+                raise RedundancyError(
+                    target=tuple(
+                        observer for observer in observers if observer in key_observers
+                    ),
+                    message="redudancy observer was given.",
+                )
+
+    def unbind(
+        self,
+        keys: tuple[str],
+        observers: tuple[Callable[[Any | None], None]],
+    ) -> None:
+        for key in keys:
+            i = self.__index(key)
+            if self.__observers is None or i not in self.__observers:
+                raise KeyError(key)
+            for observer in observers:
+                self.__observers[i].remove(observer)
+
+    def subscribe(self, observer: ChangeSetObserver, prefix: str = "") -> None:
+        """subscribe change-sets. see Store.subscribe()
+
+        changes of ReactiveStates not observed in template are not delivered.
+        """
+        if self.__subscribers is None:
+            self.__subscribers = {}
+        if self.__pending is None:
+            self.__pending = {}
+        if observer in self.__subscribers:
+            raise RedundancyError(
+                target=observer, message="redudancy subscriber was given."
+            )
+        self.__subscribers[observer] = prefix.rstrip(".")
+
+    def unsubscribe(self, *observers: ChangeSetObserver) -> None:
+        self_subscribers = self.__subscribers if self.__subscribers is not None else {}
+        for observer in observers:
+            del self_subscribers[observer]
+
+    def bind(self, *observers: Callable[[IStore], None]) -> None:
+        """bind observers called with this store after each change-set
+
+        Raises:
+            RedundancyError: if observer given by arguments have already binded,
+                                RedudancyError is raised.
+        """
+        if self.__store_observers is None:
+            self.__store_observers = set()
+        if self.__pending is None:
+            self.__pending = {}
+        self_store_observers = self.__store_observers  # faster
+        prev_len = len(self_store_observers)
+        self_store_observers.update(observers)
+        if len(self_store_observers) < prev_len + len(observers):
+            raise RedundancyError(
+                target=tuple(
+                    observer
+                    for observer in observers
+                    if observer in self_store_observers
+                ),
+                message="redudancy observer was given.",
+            )
+
+    def unbind_self(self, *observers: Callable[[IStore], None]) -> None:
+        if self.__store_observers is None:
+            if observers:
+                raise KeyError(observers[0])
+            return
+        if not observers:
+            self.__store_observers.clear()
+        else:
+            for observer in observers:
+                self.__store_observers.remove(observer)
+
+    def on_drop_self(self, *on_drops: Callable[[], None]) -> None:
+        if self.__on_drops is None:
+            self.__on_drops = set()
+        self_on_drops = self.__on_drops  # faster
+        prev_len = len(self_on_drops)
+        self_on_drops.update(on_drops)
+        if len(self_on_drops) < prev_len + len(on_drops):
+            raise RedundancyError(
+                target=tuple(
+                    on_drop for on_drop in on_drops if on_drop in self_on_drops
+                )
+            )
+
+    def __del__(self) -> None:
+        if self.__on_drops:
+            for on_drop in self.__on_drops:
+                on_drop()
+
+
 class StateRefs(IStateRefs):
     def __init__(
         self,
@@ -1,8 +1,12 @@
 import abc
+import os
+from typing import Any
 
 import flet as ft
 
+from .ingest import IngestResult, UrlIngestor
 from .mycontrols import MyAppBar
+from .state import Store
 from .yt_dlp_wrapper import MediaDownLoad, MediaInfo
 
 
@@ -10,18 +14,68 @@ def __init__():
     pass
 
 
+DEFAULT_OUTPUT_DIR: str = os.path.join(os.path.expanduser("~"), "Downloads")
+
+
 class IMyView(metaclass=abc.ABCMeta):
     @abc.abstractmethod
-    def __init__(self, page: ft.Page) -> None:
+    def __init__(self, page: ft.Page, output_dir: str | None = None) -> None:
+        """
+        Args:
+            page: page to show the view
+            output_dir: directory to save media. None means DEFAULT_OUTPUT_DIR.
+        """
         raise NotImplementedError
 
     view: ft.View
 
+    def close(self) -> None:
+        """release workers of this view when the page is closed"""
+        pass
+
+
+def _status_of(*reliances: tuple[int, int, int]) -> str:
+    """formula of "status", reliances are ("counts",)"""
+    return "queued: {}  duplicates: {}  unsupported: {}".format(*reliances[0])
+
 
 class MainView(IMyView):
-    def __init__(self, page: ft.Page) -> None:
+    def __init__(self, page: ft.Page, output_dir: str | None = None) -> None:
         self.page: ft.Page = page  # for page button
         self.title = "YYdlp-GUI v0.1"
+        self.downloader: MediaDownLoad = MediaDownLoad(
+            output_dir=output_dir if output_dir is not None else DEFAULT_OUTPUT_DIR
+        )
+        # pasted urls are processed off the UI thread
+        self.ingestor: UrlIngestor = UrlIngestor(
+            enqueue=self.downloader.download_many,
+            known=self.downloader,
+            on_batch=self.__on_ingest_batch,
+        )
+        self.store: Store = Store(
+            name="main",
+            states=(("counts", (0, 0, 0)),),  # queued, duplicates, unsupported
+            reactives=(
+                (
+                    "status",
+                    _status_of,
+                    ("counts",),
+                    (),
+                ),
+            ),
+        )
+        self.status_text: ft.Text = ft.Text(
+            value=self.store.get("status"), text_align=ft.TextAlign.CENTER
+        )
+        self.store.bind_states(("status",), (self.__on_status,))
+        self.url_field: ft.TextField = ft.TextField(
+            multiline=True,
+            min_lines=1,
+            max_lines=8,
+            hint_text="URLs (one per line)",
+        )
+        self.file_picker: ft.FilePicker = ft.FilePicker(on_result=self.__on_file_picked)
+        page.overlay.append(self.file_picker)
         self.view: ft.View = ft.View(
             route="/main",
             appbar=MyAppBar(
@@ -29,14 +83,57 @@ class MainView(IMyView):
                 on_settings_button_click=lambda _: page.go("/settings"),
             ),
             controls=[
-                ft.Text(value="hoge", text_align=ft.TextAlign.CENTER),
-                ft.TextField(),
+                self.status_text,
+                self.url_field,
+                ft.Row(
+                    controls=[
+                        ft.ElevatedButton("Add", on_click=self.__on_add_click),
+                        ft.OutlinedButton(
+                            "Import file",
+                            on_click=lambda _: self.file_picker.pick_files(
+                                allowed_extensions=["txt"]
+                            ),
+                        ),
+                    ],
+                    alignment=ft.MainAxisAlignment.CENTER,
+                ),
             ],
         )
 
+    def __on_add_click(self, _) -> None:
+        text = self.url_field.value or ""
+        self.url_field.value = ""
+        self.page.update()
+        self.ingestor.ingest_text(text)
+
+    def __on_file_picked(self, event: ft.FilePickerResultEvent) -> None:
+        for file in event.files or ():
+            self.ingestor.ingest_file(file.path)
+
+    def __on_ingest_batch(self, result: IngestResult) -> None:
+        # called from the ingestion thread
+        queued, duplicates, unsupported = self.store.get("counts")
+        self.store.set(
+            ("counts",),
+            (
+                queued + len(result.accepted),
+                duplicates + result.duplicates,
+                unsupported + result.unsupported,
+            ),
+        )
+
+    def __on_status(self, status: Any) -> None:
+        self.status_text.value = status
+        self.page.update()
+
+    def close(self) -> None:
+        # running downloads are finished in background, queued ones are cancelled
+        self.ingestor.shutdown(wait=False)
+        self.downloader.shutdown(wait=False)
+
 
 class SettingsView(IMyView):
-    def __init__(self, page: ft.Page) -> None:
+    def __init__(self, page: ft.Page, output_dir: str | None = None) -> None:
         self.page: ft.Page = page  # for page button
         self.view: ft.View = ft.View(
             route="/settings",
@@ -75,10 +172,12 @@ class View:
         self,
         mainView: type[IMyView] = MainView,
         settingsView: type[IMyView] = SettingsView,
+        output_dir: str | None = None,
     ) -> None:
         self.views = ["main", "setting"]
         self.mainViewClass = mainView
         self.settingsViewClass = settingsView
+        self.output_dir: str | None = output_dir
 
     def run(self) -> None:
         ft.app(target=self.main, use_color_emoji=True, assets_dir="assets")
@@ -93,15 +192,23 @@ class View:
         page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
         # page.add(ft.Text(value="hoge",text_align=ft.TextAlign.CENTER))
         # ↑ code for not multiview (memo)
-        self.mainView: IMyView = self.mainViewClass(page)
-        self.settingsView: IMyView = self.settingsViewClass(page)
+        self.mainView: IMyView = self.mainViewClass(page, output_dir=self.output_dir)
+        self.settingsView: IMyView = self.settingsViewClass(
+            page, output_dir=self.output_dir
+        )
 
         page.on_route_change = self.__on_route_change
         page.on_view_pop = self.__on_pop_view
+        page.on_disconnect = self.__on_disconnect
 
         page.views.clear()
         page.go("/main")
 
+        if os.environ.get("YYDLP_GUI_STARTUP_PROBE"):
+            # for packaging/measure_startup.py
+            print("YYDLP_GUI_STARTED", flush=True)
+            os._exit(0)
+
     def __on_route_change(self, handler):
         # troupe = ft.TemplateRoute(handler.route)
         self.page.views.clear()
@@ -117,6 +224,10 @@ class View:
             print(self.page.route)
         self.page.update()
 
+    def __on_disconnect(self, handler):
+        self.mainView.close()
+        self.settingsView.close()
+
     def __on_pop_view(self, handler):
         self.page.views.pop()
         if len(self.page.views) > 1:
@@ -1,9 +1,620 @@
-# from yt_dlp import YoutubeDL
+import functools
+import os
+import queue
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any
+
+from yt_dlp import YoutubeDL
+from yt_dlp.downloader import FileDownloader, get_suitable_downloader
+from yt_dlp.downloader.fragment import FragmentFD
+from yt_dlp.downloader.http import HttpFD
+from yt_dlp.utils import PostProcessingError
+
+from . import diskio
+
+_MISSING: Any = object()
+
+
+class YoutubeDLPool():
+    """pool of long-lived YoutubeDL sessions
+
+    each session keeps loaded cookies, initialised extractors and
+    keep-alive HTTP connections per host, so they are paid once
+    instead of once per job. connections are kept by the requests handler
+    of yt-dlp (yt-dlp[default]); the urllib handler opens one per request.
+    YoutubeDL is not thread-safe, so a session is used by one thread at once.
+    it must not be used after it is returned,
+    e.g. MediaDownLoad post-processes with YoutubeDL of PostProcessPool.
+
+    Args:
+        ydl_opts: options for YoutubeDL
+        max_sessions: max number of sessions. acquiring more waits.
+        factory: function to make a new session from ydl_opts
+    """
+
+    def __init__(
+        self,
+        ydl_opts: dict[str, Any] | None = None,
+        max_sessions: int = 4,
+        factory: Callable[[dict[str, Any]], YoutubeDL] = YoutubeDL,
+    ) -> None:
+        self.ydl_opts: dict[str, Any] = ydl_opts if ydl_opts is not None else {}
+        self.__factory: Callable[[dict[str, Any]], YoutubeDL] = factory
+        # LIFO: the most recently used session has the warmest connections
+        self.__idle: queue.LifoQueue[YoutubeDL] = queue.LifoQueue()
+        self.__available: threading.BoundedSemaphore = threading.BoundedSemaphore(
+            max_sessions
+        )
+        self.__closed: bool = False
+        self.__lock: threading.Lock = threading.Lock()
+
+    @contextmanager
+    def session(self) -> Iterator[YoutubeDL]:
+        """borrow a session exclusively
+
+        Raises:
+            RuntimeError: if the pool has been closed, RuntimeError is raised.
+        """
+        with self.__available:
+            if self.__closed:
+                raise RuntimeError("cannot borrow a session after close")
+            try:
+                ydl = self.__idle.get_nowait()
+            except queue.Empty:
+                ydl = self.__factory(self.ydl_opts)
+            try:
+                yield ydl
+            finally:
+                with self.__lock:
+                    closed = self.__closed
+                    if not closed:
+                        self.__idle.put(ydl)
+                if closed:
+                    ydl.close()
+
+    def close(self) -> None:
+        """close idle sessions. borrowed ones are closed when they are returned."""
+        with self.__lock:
+            self.__closed = True
+            sessions = []
+            while not self.__idle.empty():
+                sessions.append(self.__idle.get_nowait())
+        for ydl in sessions:
+            ydl.close()
+
 
 class MediaInfo():
-    def __init__(self):
-        pass
+    """extract information of media without downloading
+
+    Args:
+        url: media url
+        ydl_opts: options for YoutubeDL. ignored when pool is given.
+        pool: shared sessions to extract with
+        ie_key: extractor already matched for url, e.g. by UrlIngestor.
+                    if None, every extractor is tried again.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ydl_opts: dict[str, Any] | None = None,
+        pool: YoutubeDLPool | None = None,
+        ie_key: str | None = None,
+    ) -> None:
+        self.url: str = url
+        self.ydl_opts: dict[str, Any] = ydl_opts if ydl_opts is not None else {}
+        self.pool: YoutubeDLPool | None = pool
+        self.ie_key: str | None = ie_key
+        self.info: dict[str, Any] | None = None
+
+    def extract(self, ydl: YoutubeDL | None = None) -> dict[str, Any]:
+        if ydl is not None:
+            info = self.__extract(ydl)
+        elif self.pool is not None:
+            with self.pool.session() as session:
+                info = self.__extract(session)
+        else:
+            with YoutubeDL(self.ydl_opts) as session:
+                info = self.__extract(session)
+        self.info = info
+        return info
+
+    def __extract(self, ydl: YoutubeDL) -> dict[str, Any]:
+        return ydl.extract_info(
+            self.url, download=False, ie_key=self.ie_key, process=True
+        )
+
+    def filesize(self) -> int | None:
+        """return estimated size in bytes, or None if unknown"""
+        info = self.info
+        if info is None:
+            return None
+        entries = info.get("entries")
+        if entries is not None:
+            sizes = [MediaInfo._filesize_of(entry) for entry in entries if entry]
+            return sum(size for size in sizes if size) or None
+        return MediaInfo._filesize_of(info)
+
+    def merge_size(self) -> int | None:
+        """return estimated size of files muxed from requested_formats
+
+        they are written by post-processing, next to the downloaded formats.
+        """
+        info = self.info
+        if info is None:
+            return None
+        entries = info.get("entries")
+        total = 0
+        for entry in entries if entries is not None else (info,):
+            if entry and len(entry.get("requested_formats") or ()) > 1:
+                total += MediaInfo._filesize_of(entry) or 0
+        return total or None
+
+    @staticmethod
+    def _filesize_of(info: dict[str, Any]) -> int | None:
+        formats = info.get("requested_formats") or (info,)
+        total = 0
+        for fmt in formats:
+            total += fmt.get("filesize") or fmt.get("filesize_approx") or 0
+        return total or None
+
+
+class PostProcessPool():
+    """run yt-dlp post-processing apart from download threads
+
+    download threads hand over jobs through a bounded queue after their
+    downloads are finished. when the queue is full, download threads wait
+    until post-processors catch up (backpressure).
+    YoutubeDL is not thread-safe, so each worker runs jobs with
+    its own YoutubeDL made by factory.
+    post-processors mostly wait for ffmpeg subprocesses,
+    so threads are enough to use all CPU cores.
+
+    Args:
+        factory: function to make YoutubeDL of a worker
+        max_workers: number of post-process threads. default is CPU cores.
+        max_queued: size of the queue. default is 2 * max_workers.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], YoutubeDL],
+        max_workers: int | None = None,
+        max_queued: int | None = None,
+    ) -> None:
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.__factory: Callable[[], YoutubeDL] = factory
+        self.__queue: queue.Queue[tuple[Callable[[YoutubeDL], Any], Future] | None] = (
+            queue.Queue(maxsize=max_queued or self.max_workers * 2)
+        )
+        self.__threads: tuple[threading.Thread, ...] = tuple(
+            threading.Thread(
+                target=self.__worker, name=f"PostProcessPool_{i}", daemon=True
+            )
+            for i in range(self.max_workers)
+        )
+        self.__closed: bool = False
+        self.__lock: threading.Lock = threading.Lock()
+        for thread in self.__threads:
+            thread.start()
+
+    def submit(self, fn: Callable[[YoutubeDL], Any]) -> Future:
+        """queue fn, which is called with YoutubeDL of a worker.
+
+        this blocks while the queue is full.
+
+        Raises:
+            RuntimeError: if the pool has been shut down, RuntimeError is raised.
+        """
+        future: Future = Future()
+        with self.__lock:
+            if self.__closed:
+                raise RuntimeError("cannot submit post-processing after shutdown")
+            self.__queue.put((fn, future))
+        return future
+
+    def __worker(self) -> None:
+        self_queue = self.__queue  # faster
+        ydl: YoutubeDL | None = None
+        try:
+            while (item := self_queue.get()) is not None:
+                fn, future = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if ydl is None:
+                        ydl = self.__factory()
+                    future.set_result(fn(ydl))
+                except BaseException as err:
+                    future.set_exception(err)
+        finally:
+            if ydl is not None:
+                ydl.close()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """stop workers after all queued post-processing"""
+        with self.__lock:
+            if not self.__closed:
+                self.__closed = True
+                for _ in self.__threads:
+                    self.__queue.put(None)
+        if wait:
+            for thread in self.__threads:
+                thread.join()
+
+
+class _DeferredPostProcess():
+    """post-processing of one job
+
+    steps are recorded by a download session in the order yt-dlp runs them,
+    and replayed by a PostProcessPool worker after the download has returned:
+    post-processors and post hooks of each downloaded file,
+    download archive records and after_video post-processors.
+    info is the info dict of the job. the steps update it in place.
+    """
+
+    def __init__(self) -> None:
+        self.info: dict[str, Any] | None = None
+        self.steps: list[tuple[str, dict[str, Any], tuple[Any, ...]]] = []
+
+    def __call__(self, ydl: YoutubeDL) -> dict[str, Any] | None:
+        failed: set[int] = set()
+        for kind, info, args in self.steps:
+            if kind == "post_process":
+                if not _DeferredPostProcess.__post_process(ydl, info, *args):
+                    failed.add(id(info))
+            elif kind == "archive":
+                downloads = info.get("requested_downloads") or ()
+                if not any(id(download) in failed for download in downloads):
+                    ydl.record_download_archive(info)
+            else:
+                new_info = ydl.run_all_pps(kind, info)
+                if new_info is not info:
+                    info.clear()
+                    info.update(new_info)
+        return self.info
+
+    @staticmethod
+    def __post_process(
+        ydl: YoutubeDL,
+        target: dict[str, Any],
+        filename: str,
+        info: dict[str, Any],
+        files_to_move: dict[str, Any] | None,
+    ) -> bool:
+        """run post-processors like YoutubeDL.process_info() does
+
+        Returns:
+            bool: False if post-processing failed and ignoreerrors is set.
+        """
+        for pp in info.get("__postprocessors") or ():
+            # fixups are made with the download session
+            pp.set_downloader(ydl)
+        before = dict(info)
+        try:
+            info = ydl.post_process(filename, info, files_to_move)
+        except PostProcessingError as err:
+            ydl.report_error(f"Postprocessing: {err}")
+            return False
+        try:
+            for ph in ydl._post_hooks:
+                ph(info["filepath"])
+        except Exception as err:
+            ydl.report_error(f"post hooks: {err}")
+            return False
+        # target is the entry of requested_downloads. give it the new filepath etc.
+        target.update(
+            (key, value)
+            for key, value in info.items()
+            if before.get(key, _MISSING) is not value
+        )
+        return True
+
+
+class _DiskIODownloader(FileDownloader):
+    """mixin of yt-dlp native downloaders writing through diskio.CoalescingWriter
+
+    the output file is preallocated to its known filesize, blocks are written
+    holding a writer slot of the device, and consumed from the job's reservation.
+    """
+
+    ydl: "_DeferredPostProcessYoutubeDL"
+
+    def real_download(self, filename: str, info_dict: dict[str, Any]) -> bool:
+        self._size_hint: int | None = info_dict.get("filesize")
+        return super().real_download(filename, info_dict)
+
+    def sanitize_open(
+        self, filename: str, open_mode: str
+    ) -> tuple[diskio.Writable, str]:
+        stream, filename = super().sanitize_open(filename, open_mode)
+        if filename == "-" or open_mode not in ("wb", "ab"):
+            # stdout, fragment files and .ytdl files
+            return stream, filename
+        writer = diskio.CoalescingWriter(
+            stream,
+            size_hint=getattr(self, "_size_hint", None),
+            buffer_size=self.params.get("buffersize") or diskio.COALESCE_SIZE,
+            limiter=self.ydl.disk_limiter,
+            reservation=self.ydl.disk_reservation,
+        )
+        return writer, filename
+
+
+@functools.cache
+def _disk_io_downloader(fd_class: type[FileDownloader]) -> type[FileDownloader]:
+    # keep the class name, FD_NAME is made from it
+    return type(fd_class.__name__, (_DiskIODownloader, fd_class), {})
+
+
+class _DeferredPostProcessYoutubeDL(YoutubeDL):
+    """YoutubeDL session which records post-processing instead of running it
+
+    while deferred is set, post-processors, post hooks, download archive records
+    and after_video post-processors are recorded into it,
+    to be run by PostProcessPool after the download.
+    when disk_limiter is set, HTTP and fragment downloads write through diskio.
+    """
+
+    def __init__(
+        self,
+        params: dict[str, Any],
+        disk_limiter: diskio.DeviceLimiter | None = None,
+    ) -> None:
+        # post hooks are called by PostProcessPool
+        super().__init__({**params, "post_hooks": []})
+        self.deferred: _DeferredPostProcess | None = None
+        self.disk_limiter: diskio.DeviceLimiter | None = disk_limiter
+        self.disk_reservation: diskio.Reservation | None = None
+
+    def dl(
+        self,
+        name: str,
+        info: dict[str, Any],
+        subtitle: bool = False,
+        test: bool = False,
+    ) -> bool:
+        if test or name == "-" or self.disk_limiter is None or not info.get("url"):
+            return super().dl(name, info, subtitle, test)
+        fd_class = get_suitable_downloader(info, self.params)
+        if not issubclass(fd_class, HttpFD | FragmentFD):
+            # external downloaders write by themselves
+            return super().dl(name, info, subtitle, test)
+        fd = _disk_io_downloader(fd_class)(self, self.params)
+        for ph in self._progress_hooks:
+            fd.add_progress_hook(ph)
+        self.write_debug(f"Invoking {fd.FD_NAME} downloader through diskio")
+        new_info = self._copy_infodict(info)
+        if new_info.get("http_headers") is None:
+            new_info["http_headers"] = self._calc_headers(new_info)
+        return fd.download(name, new_info, subtitle)
+
+    def post_process(
+        self,
+        filename: str,
+        info: dict[str, Any],
+        files_to_move: dict[str, Any] | None = None,
+    ) -> dict[str, Any]:
+        if self.deferred is None:
+            return super().post_process(filename, info, files_to_move)
+        info["filepath"] = filename
+        # info is pruned by process_video_result() after this returns
+        args = (filename, dict(info), files_to_move)
+        self.deferred.steps.append(("post_process", info, args))
+        return info
+
+    def record_download_archive(self, info_dict: dict[str, Any]) -> None:
+        if self.deferred is None:
+            return super().record_download_archive(info_dict)
+        self.deferred.steps.append(("archive", info_dict, ()))
+
+    def run_all_pps(
+        self,
+        key: str,
+        info: dict[str, Any],
+        *,
+        additional_pps: list[Any] | None = None,
+    ) -> dict[str, Any]:
+        if key != "after_video" or self.deferred is None:
+            return super().run_all_pps(key, info, additional_pps=additional_pps)
+        self.deferred.steps.append((key, info, ()))
+        return info
+
+
+def _chain(
+    source: Future,
+    future: Future,
+    error: BaseException | None = None,
+    release: Callable[[], None] | None = None,
+) -> None:
+    """set result of source to future when it is done, or error if given
+
+    release is called before future is done, e.g. to release disk space.
+    """
+
+    def on_done(_: Future) -> None:
+        if release is not None:
+            release()
+        if source.cancelled():
+            future.set_exception(error or RuntimeError("post-processing was cancelled"))
+        elif error is not None or source.exception() is not None:
+            future.set_exception(error or source.exception())
+        else:
+            future.set_result(source.result())
+
+    source.add_done_callback(on_done)
+
 
 class MediaDownLoad():
-    def __init__(self):
-        pass
+    """download media by worker threads
+
+    Before each job, free space of output_dir minus space held by running jobs
+    is checked, and the job holds its size until it is written.
+    The size of files muxed from separate video and audio is held
+    until the post-processing of the job is finished.
+    HTTP and fragment downloads write through diskio.CoalescingWriter:
+    files are preallocated, written in large aligned blocks, and
+    max_writers_per_device blocks are written at once on each target device.
+    Post-processing is handed over to PostProcessPool when the download of
+    a job has returned, so download threads go on to the next job
+    while earlier ones are muxed.
+    YoutubeDL sessions are shared through pool. pass it to MediaInfo
+    to extract with the same sessions.
+
+    Args:
+        output_dir: directory to save media
+        max_workers: number of download threads
+        max_writers_per_device: number of concurrent writers on one device
+        ydl_opts: additional options for YoutubeDL
+        buffer_size: block size of each write
+        postprocess_workers: number of post-process threads. default is CPU cores.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = ".",
+        max_workers: int = 4,
+        max_writers_per_device: int = 2,
+        ydl_opts: dict[str, Any] | None = None,
+        buffer_size: int = diskio.COALESCE_SIZE,
+        postprocess_workers: int | None = None,
+    ) -> None:
+        self.output_dir: str = os.path.abspath(output_dir)
+        self.ydl_opts: dict[str, Any] = {
+            "paths": {"home": self.output_dir},
+            # coalesce writes: fixed large blocks instead of
+            # the default 1KiB block which is resized on the fly
+            "buffersize": buffer_size,
+            "noresizebuffer": True,
+            **(ydl_opts if ydl_opts is not None else {}),
+        }
+        self.__limiter: diskio.DeviceLimiter = diskio.DeviceLimiter(
+            max_writers_per_device
+        )
+        self.__executor: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="MediaDownLoad"
+        )
+        self.__postprocess_pool: PostProcessPool = PostProcessPool(
+            lambda: YoutubeDL(self.ydl_opts), postprocess_workers
+        )
+        self.pool: YoutubeDLPool = YoutubeDLPool(
+            self.ydl_opts,
+            max_sessions=max_workers,
+            factory=lambda opts: _DeferredPostProcessYoutubeDL(opts, self.__limiter),
+        )
+        self.__urls: set[str] = set()
+
+    def download(self, url: str, ie_key: str | None = None) -> Future:
+        """queue url and return Future of info dict
+
+        the Future is done when post-processing is also finished.
+        url is queued again if the Future fails or is cancelled.
+
+        Args:
+            ie_key: extractor already matched for url, see MediaInfo
+
+        Raises:
+            RuntimeError: if shutdown() has been called, RuntimeError is raised.
+        """
+        future: Future = Future()
+        self.__urls.add(url)
+        future.add_done_callback(
+            lambda future: self.__urls.discard(url)
+            if future.cancelled() or future.exception() is not None
+            else None
+        )
+        try:
+            job = self.__executor.submit(self.__download, url, ie_key, future)
+        except RuntimeError:
+            # after shutdown
+            self.__urls.discard(url)
+            raise
+        # shutdown(wait=False) cancels jobs which have not started
+        job.add_done_callback(lambda job: future.cancel() if job.cancelled() else None)
+        return future
+
+    def download_many(
+        self, urls: Iterable[str | tuple[str, str | None]]
+    ) -> list[Future]:
+        """queue urls, or (url, ie_key) e.g. from UrlIngestor"""
+        return [
+            self.download(*url) if isinstance(url, tuple) else self.download(url)
+            for url in urls
+        ]
+
+    def __contains__(self, url: object) -> bool:
+        """url is queued, running or has been downloaded"""
+        return url in self.__urls
+
+    def __download(self, url: str, ie_key: str | None, future: Future) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        deferred = _DeferredPostProcess()
+        error: BaseException | None = None
+        limiter = self.__limiter
+        reservation: diskio.Reservation | None = None
+        merge_size = 0
+        try:
+            with self.pool.session() as ydl:
+                ydl.deferred = deferred
+                try:
+                    media_info = MediaInfo(url, pool=self.pool, ie_key=ie_key)
+                    deferred.info = media_info.extract(ydl)
+                    merge_size = media_info.merge_size() or 0
+                    reservation = limiter.hold(
+                        self.output_dir, (media_info.filesize() or 0) + merge_size
+                    )
+                    ydl.disk_reservation = reservation
+                    deferred.info = ydl.process_ie_result(deferred.info, download=True)
+                finally:
+                    ydl.deferred = None
+                    ydl.disk_reservation = None
+        except BaseException as err:
+            error = err
+
+        def release() -> None:
+            if reservation is not None:
+                limiter.release(reservation)
+
+        if reservation is not None:
+            # the rest of the download is released, the muxed files stay held
+            limiter.consume(reservation, max(0, reservation.remaining - merge_size))
+        if not deferred.steps:
+            release()
+            if error is None:
+                future.set_result(deferred.info)
+            else:
+                future.set_exception(error)
+            return
+        # files already downloaded are post-processed even if a later one failed
+        try:
+            postprocessed = self.__postprocess_pool.submit(deferred)
+        except RuntimeError as err:
+            release()
+            future.set_exception(error or err)
+            return
+        _chain(postprocessed, future, error, release)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """stop taking jobs
+
+        If wait is False, queued jobs which have not started are cancelled,
+        and running ones are finished in background.
+        Post-processors are stopped after all running downloads have handed
+        their post-processing over, and sessions are closed after that.
+        """
+        self.__executor.shutdown(wait=False, cancel_futures=not wait)
+        if wait:
+            self.__close()
+        else:
+            # not daemon: running jobs are post-processed before the interpreter exits
+            threading.Thread(target=self.__close, name="MediaDownLoad_shutdown").start()
+
+    def __close(self) -> None:
+        self.__executor.shutdown(wait=True)
+        self.__postprocess_pool.shutdown(wait=True)
+        # sessions are closed only when no download uses them
+        self.pool.close()
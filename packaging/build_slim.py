@@ -0,0 +1,183 @@
+"""build smaller, faster-starting bundle by PyInstaller
+
+- bundle only yt-dlp extractors in the allowlist (packaging/extractors.txt)
+  and the extractors they import.
+- bundle bytecode compiled with --optimize (asserts and docstrings stripped).
+- exclude modules the GUI does not use (tests, tk, flet web/cli/testing, ...).
+- build --onedir. onefile unpacks the whole archive to a temp directory
+  on every launch, onedir is unpacked once on install.
+
+Usage:
+    python packaging/build_slim.py [-n NAME] [--allowlist FILE] [--optimize {0,1,2}] [--debug]
+"""
+
+import argparse
+import ast
+import importlib.util
+import os
+import sys
+from collections.abc import Iterator
+
+import PyInstaller.__main__
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+ENTRYPOINT = os.path.join(ROOT, "YYdlp_GUI", "__main__.py")
+RUNTIME_HOOK = os.path.join(HERE, "rthook_pruned_extractors.py")
+
+EXTRACTOR_PACKAGE = "yt_dlp.extractor"
+# always needed by yt-dlp itself
+ESSENTIAL_EXTRACTORS: tuple[str, ...] = (
+    "__init__",
+    "_extractors",
+    "extractors",
+    "common",
+    "commonmistakes",
+    "commonprotocols",
+    "generic",
+)
+EXCLUDES: tuple[str, ...] = (
+    # standard library
+    "tkinter",
+    "unittest",
+    "doctest",
+    "pydoc",
+    "pdb",
+    "lib2to3",
+    "idlelib",
+    "xmlrpc",
+    "test",
+    "asyncio.__main__",
+    # flet: web server, cli and test helpers
+    "flet.fastapi",
+    "flet.testing",
+    "flet.pytest_plugin",
+    "flet.cli",
+    "flet_cli",
+    "flet_web",
+    "pytest",
+    "_pytest",
+    # optional heavy packages pulled in by test extras
+    "numpy",
+    "PIL",
+    "skimage",
+    # yt-dlp: lazy_extractors imports nothing, but its regexes match every site
+    "yt_dlp.extractor.lazy_extractors",
+)
+
+
+def read_allowlist(path: str) -> set[str]:
+    with open(path, encoding="utf-8") as f:
+        return {
+            line.strip()
+            for line in f
+            if line.strip() and not line.lstrip().startswith("#")
+        }
+
+
+def extractor_modules(directory: str) -> set[str]:
+    """return top-level module names in yt_dlp/extractor"""
+    names = set()
+    for entry in os.listdir(directory):
+        path = os.path.join(directory, entry)
+        if entry.endswith(".py"):
+            names.add(entry[:-3])
+        elif os.path.isfile(os.path.join(path, "__init__.py")):
+            names.add(entry)
+    return names
+
+
+def _sources(directory: str, name: str) -> Iterator[tuple[str, str]]:
+    """yield (path, package) of source files of an extractor module"""
+    path = os.path.join(directory, name)
+    if os.path.isdir(path):
+        for current, _, files in os.walk(path):
+            package = ".".join(
+                (EXTRACTOR_PACKAGE, *os.path.relpath(current, directory).split(os.sep))
+            )
+            for file in files:
+                if file.endswith(".py"):
+                    yield os.path.join(current, file), package
+    elif os.path.isfile(path + ".py"):
+        yield path + ".py", EXTRACTOR_PACKAGE
+
+
+def imported_extractors(directory: str, name: str) -> set[str]:
+    """return extractor modules imported by an extractor module"""
+    found = set()
+    prefix = EXTRACTOR_PACKAGE + "."
+    for path, package in _sources(directory, name):
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.ImportFrom):
+                continue
+            if node.level:
+                base = package.rsplit(".", node.level - 1)[0] if node.level > 1 else package
+                module = f"{base}.{node.module}" if node.module else base
+            else:
+                module = node.module or ""
+            if module.startswith(prefix):
+                found.add(module[len(prefix) :].split(".", 1)[0])
+            elif module == EXTRACTOR_PACKAGE:
+                # from . import foo
+                found.update(alias.name for alias in node.names)
+    return found
+
+
+def resolve_allowlist(directory: str, allowlist: set[str]) -> set[str]:
+    """return allowlist with essentials and imported modules (transitive)"""
+    available = extractor_modules(directory)
+    unknown = allowlist - available
+    if unknown:
+        raise SystemExit(f"unknown extractor modules in allowlist: {sorted(unknown)}")
+    keep = set()
+    pending = [*ESSENTIAL_EXTRACTORS, *allowlist]
+    while pending:
+        name = pending.pop()
+        if name in keep or name not in available:
+            continue
+        keep.add(name)
+        if name not in ("_extractors", "extractors", "__init__"):
+            pending.extend(imported_extractors(directory, name))
+    return keep
+
+
+def pyinstaller_args(args: argparse.Namespace) -> list[str]:
+    spec = importlib.util.find_spec(EXTRACTOR_PACKAGE)
+    if spec is None or not spec.submodule_search_locations:
+        raise SystemExit("yt-dlp is not installed")
+    directory = spec.submodule_search_locations[0]
+    keep = resolve_allowlist(directory, read_allowlist(args.allowlist))
+    pruned = sorted(extractor_modules(directory) - keep)
+    print(f"bundling {len(keep)} extractor modules, pruning {len(pruned)}", file=sys.stderr)
+
+    options = [
+        ENTRYPOINT,
+        "--onedir",
+        "--noconfirm",
+        "--optimize",
+        str(args.optimize),
+        "--runtime-hook",
+        RUNTIME_HOOK,
+        "-n",
+        args.name,
+        *(["--debug", "all"] if args.debug else ["-w"]),
+    ]
+    for module in (*EXCLUDES, *(f"{EXTRACTOR_PACKAGE}.{name}" for name in pruned)):
+        options += ["--exclude-module", module]
+    return options
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("-n", "--name", default="YYdlp-GUI_slim")
+    parser.add_argument("--allowlist", default=os.path.join(HERE, "extractors.txt"))
+    parser.add_argument("--optimize", type=int, choices=(0, 1, 2), default=2)
+    parser.add_argument("--debug", action="store_true")
+    args = parser.parse_args(argv)
+    PyInstaller.__main__.run(pyinstaller_args(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""measure startup time and size of a built bundle
+
+the app is launched with YYDLP_GUI_STARTUP_PROBE=1. it prints
+STARTUP_MARKER and exits as soon as the first view is shown,
+so the time until exit is the time until a window is ready.
+the first run is reported separately as cold start.
+
+Usage:
+    python packaging/measure_startup.py dist/YYdlp-GUI_slim [-r RUNS]
+    python packaging/measure_startup.py dist/YYdlp-GUI_onefile.exe
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+STARTUP_MARKER = "YYDLP_GUI_STARTED"
+
+
+def find_executable(path: str) -> str:
+    if os.path.isfile(path):
+        return path
+    name = os.path.basename(os.path.normpath(path))
+    for candidate in (name, name + ".exe"):
+        executable = os.path.join(path, candidate)
+        if os.path.isfile(executable):
+            return executable
+    raise SystemExit(f"executable is not found in {path}")
+
+
+def bundle_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(
+        os.path.getsize(os.path.join(current, file))
+        for current, _, files in os.walk(path)
+        for file in files
+    )
+
+
+def launch(executable: str, timeout: float) -> float:
+    env = {**os.environ, "YYDLP_GUI_STARTUP_PROBE": "1"}
+    started = time.perf_counter()
+    result = subprocess.run(
+        [executable], env=env, capture_output=True, text=True, timeout=timeout, check=False
+    )
+    elapsed = time.perf_counter() - started
+    if STARTUP_MARKER not in result.stdout:
+        raise SystemExit(
+            f"{executable} exited without {STARTUP_MARKER} (code {result.returncode})\n"
+            f"{result.stderr}"
+        )
+    return elapsed
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("path", help="dist directory (onedir) or executable (onefile)")
+    parser.add_argument("-r", "--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args(argv)
+
+    executable = find_executable(args.path)
+    cold = launch(executable, args.timeout)
+    warm = [launch(executable, args.timeout) for _ in range(args.runs)]
+    print(f"bundle size  {bundle_size(args.path) / (1 << 20):10.1f} MiB")
+    print(f"cold start   {cold:10.3f} s")
+    if warm:
+        print(f"warm median  {statistics.median(warm):10.3f} s")
+        print(f"warm min/max {min(warm):10.3f} / {max(warm):.3f} s")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
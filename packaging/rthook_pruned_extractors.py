@@ -0,0 +1,52 @@
+"""PyInstaller runtime hook of the slim build (packaging/build_slim.py)
+
+extractor modules out of the allowlist are not bundled.
+yt_dlp.extractor._extractors still imports every extractor,
+so a missing one is replaced by a module of disabled placeholder extractors.
+lazy_extractors is not bundled either, so yt-dlp falls back to _extractors.
+"""
+
+import importlib.abc
+import importlib.machinery
+import sys
+from types import ModuleType
+from typing import Any
+
+_PREFIX = "yt_dlp.extractor."
+
+
+class _PrunedExtractorFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def find_spec(
+        self, fullname: str, path: Any = None, target: Any = None
+    ) -> importlib.machinery.ModuleSpec | None:
+        if not fullname.startswith(_PREFIX) or fullname.endswith(".lazy_extractors"):
+            return None
+        return importlib.machinery.ModuleSpec(fullname, self)
+
+    def create_module(self, spec: importlib.machinery.ModuleSpec) -> None:
+        return None
+
+    def exec_module(self, module: ModuleType) -> None:
+        def __getattr__(name: str) -> type:
+            if name.startswith("__"):
+                raise AttributeError(name)
+            from yt_dlp.extractor.common import InfoExtractor
+
+            placeholder = type(
+                name,
+                (InfoExtractor,),
+                {
+                    "__module__": module.__name__,
+                    "IE_DESC": False,
+                    "_WORKING": False,
+                    "suitable": classmethod(lambda cls, url: False),
+                },
+            )
+            setattr(module, name, placeholder)
+            return placeholder
+
+        module.__getattr__ = __getattr__  # type: ignore[method-assign]
+
+
+# last, so that only modules missing in the bundle reach this finder
+sys.meta_path.append(_PrunedExtractorFinder())
@@ -0,0 +1,252 @@
+"""end-to-end throughput benchmark with a local fake media server
+
+drive MediaDownLoad (or MediaInfo) against FakeMediaServer in a child process,
+update a job Store from yt-dlp progress hooks, and consume its change-sets
+on a separate "UI" thread like the GUI does.
+
+Usage:
+    python -m tests.benchmark --kind hls --jobs 20 --latency 0.02
+    python -m tests.benchmark --save bench_baseline.json
+    python -m tests.benchmark --baseline bench_baseline.json
+
+Reports:
+    MB/s of media files written, jobs/min, p50/p99 UI-update latency
+    and peak RSS of this process.
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from YYdlp_GUI.state import Change, Store, StoreTemplate
+from YYdlp_GUI.yt_dlp_wrapper import MediaDownLoad, MediaInfo
+
+from .fake_media_server import FakeMediaConfig, FakeMediaProcess
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+# (key, higher is better)
+METRICS: tuple[tuple[str, bool], ...] = (
+    ("mb_per_s", True),
+    ("jobs_per_min", True),
+    ("ui_latency_p50_ms", False),
+    ("ui_latency_p99_ms", False),
+    ("peak_rss_mb", False),
+)
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / (1 << 10)
+
+
+def written_bytes(info: dict[str, Any]) -> int:
+    """return bytes of media files written for a job"""
+    return sum(
+        os.path.getsize(download["filepath"])
+        for download in info.get("requested_downloads") or ()
+        if os.path.isfile(download.get("filepath") or "")
+    )
+
+
+def percentile(values: list[float], ratio: float) -> float | None:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+JOB_TEMPLATE: StoreTemplate = StoreTemplate(
+    name="job",
+    states=(
+        ("status", "queued"),
+        ("downloaded", 0),
+        ("total", None),
+        ("speed", None),
+        ("eta", None),
+        ("updated_at", None),
+    ),
+    reactives=(
+        (
+            "progress",
+            lambda downloaded, total: downloaded * 100 // total if total else None,
+            ("downloaded", "total"),
+            (),
+        ),
+    ),
+)
+
+
+class UIConsumer:
+    """consume change-sets on a separate thread and measure latency
+
+    latency is the time from the progress hook to the consumer,
+    taken from "updated_at" of each change-set.
+    """
+
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.__queue: queue.SimpleQueue[tuple[Change, ...] | None] = queue.SimpleQueue()
+        self.__thread: threading.Thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def subscriber(self, changes: tuple[Change, ...]) -> None:
+        self.__queue.put(changes)
+
+    def __run(self) -> None:
+        self_latencies = self.latencies  # faster
+        while (changes := self.__queue.get()) is not None:
+            now = time.perf_counter()
+            for change in changes:
+                if change.key.endswith("updated_at"):
+                    self_latencies.append(now - change.new)
+
+    def close(self) -> None:
+        self.__queue.put(None)
+        self.__thread.join()
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    config = FakeMediaConfig(
+        file_size=args.size,
+        fragment_size=args.fragment_size,
+        fragments=args.fragments,
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        error_rate=args.error_rate,
+    )
+    root = Store(name="jobs")
+    consumer = UIConsumer()
+    root.subscribe(consumer.subscriber)
+    # Store is not thread-safe. download threads update it one by one.
+    lock = threading.Lock()
+    with FakeMediaProcess(config) as server, tempfile.TemporaryDirectory() as output_dir:
+        urls = [server.url(args.kind, f"job{i}") for i in range(args.jobs)]
+        stores = {
+            url: root.store_from(JOB_TEMPLATE, f"job{i}")
+            for i, url in enumerate(urls)
+        }
+
+        def progress_hook(d: dict[str, Any]) -> None:
+            info = d.get("info_dict", {})
+            store = stores.get(info.get("original_url") or info.get("webpage_url"))
+            if store is None:
+                return
+            with lock, store.batch():
+                store.set(("status",), d["status"])
+                store.set(("downloaded",), d.get("downloaded_bytes") or 0)
+                store.set(("total",), d.get("total_bytes") or d.get("total_bytes_estimate"))
+                store.set(("speed",), d.get("speed"))
+                store.set(("eta",), d.get("eta"))
+                store.set(("updated_at",), time.perf_counter())
+
+        started = time.perf_counter()
+        failed = 0
+        written: int | None = None
+        if args.mode == "download":
+            downloader = MediaDownLoad(
+                output_dir,
+                max_workers=args.workers,
+                ydl_opts={
+                    "quiet": True,
+                    "noprogress": True,
+                    "progress_hooks": [progress_hook],
+                },
+            )
+            futures = [downloader.download(url) for url in urls]
+            written = 0
+            for future in futures:
+                if future.exception() is not None:
+                    failed += 1
+                else:
+                    written += written_bytes(future.result())
+            downloader.shutdown()
+        else:
+            downloader = MediaDownLoad(output_dir, max_workers=args.workers, ydl_opts={"quiet": True})
+            with ThreadPoolExecutor(max_workers=args.workers) as executor:
+                futures = [
+                    executor.submit(MediaInfo(url, pool=downloader.pool).extract) for url in urls
+                ]
+            for future in futures:
+                if future.exception() is not None:
+                    failed += 1
+            downloader.shutdown()
+        elapsed = time.perf_counter() - started
+    consumer.close()
+    return {
+        "kind": args.kind,
+        "mode": args.mode,
+        "jobs": args.jobs,
+        "failed": failed,
+        "seconds": elapsed,
+        "mb_per_s": None if written is None else written / (1 << 20) / elapsed,
+        "jobs_per_min": (args.jobs - failed) * 60 / elapsed,
+        "ui_latency_p50_ms": _ms(percentile(consumer.latencies, 0.50)),
+        "ui_latency_p99_ms": _ms(percentile(consumer.latencies, 0.99)),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else seconds * 1000
+
+
+def report(result: dict[str, Any], baseline: dict[str, Any] | None = None) -> str:
+    lines = [
+        f"kind={result['kind']} mode={result['mode']} jobs={result['jobs']} "
+        f"failed={result['failed']} seconds={result['seconds']:.2f}"
+    ]
+    for key, higher_is_better in METRICS:
+        value = result.get(key)
+        line = f"  {key:<20}{'-' if value is None else f'{value:.2f}':>12}"
+        base = baseline.get(key) if baseline else None
+        if value is not None and base:
+            delta = (value - base) / base * 100
+            better = delta >= 0 if higher_is_better else delta <= 0
+            line += f"  baseline {base:.2f} ({delta:+.1f}% {'better' if better else 'worse'})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--kind", choices=("progressive", "hls", "dash"), default="progressive")
+    parser.add_argument("--mode", choices=("download", "info"), default="download")
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--size", type=int, default=8 << 20, help="bytes of progressive file")
+    parser.add_argument("--fragment-size", type=int, default=512 << 10)
+    parser.add_argument("--fragments", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    parser.add_argument("--bandwidth", type=int, default=0, help="bytes/s per connection")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--baseline", help="JSON file of a previous result to compare with")
+    parser.add_argument("--save", help="write the result as JSON")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(report(result, baseline))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""local HTTP server which serves synthetic media for benchmarks
+
+Routes:
+    /progressive/<name>.mp4           progressive file (supports Range)
+    /hls/<name>/<name>.m3u8           HLS media playlist
+    /hls/<name>/seg<i>.ts             HLS fragment
+    /dash/<name>/<name>.mpd           DASH manifest (SegmentTemplate)
+    /dash/<name>/init.mp4             DASH initialization segment
+    /dash/<name>/seg<i>.m4s           DASH fragment
+
+latency is added to every response. bandwidth throttles each connection.
+error_rate is applied only to media payloads (files and fragments),
+so extraction succeeds and errors exercise yt-dlp's retries.
+"""
+
+import multiprocessing
+import random
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing.connection import Connection
+from typing import Any
+
+_CHUNK: int = 64 << 10
+_PATTERN: bytes = bytes(range(256)) * (_CHUNK // 256)
+
+
+@dataclass
+class FakeMediaConfig:
+    file_size: int = 8 << 20
+    fragment_size: int = 512 << 10
+    fragments: int = 16
+    fragment_duration: int = 2
+    latency: float = 0.0  # seconds per request
+    bandwidth: int = 0  # bytes per second per connection. 0 is unlimited
+    error_rate: float = 0.0  # ratio of media requests answered with 503
+    seed: int = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeMediaServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def do_HEAD(self) -> None:
+        self.__handle(head=True)
+
+    def do_GET(self) -> None:
+        self.__handle(head=False)
+
+    def __handle(self, head: bool) -> None:
+        config = self.server.config
+        if config.latency:
+            time.sleep(config.latency)
+        path = self.path.split("?", 1)[0]
+        if re.fullmatch(r"/progressive/[\w-]+\.mp4", path):
+            self.__payload(config.file_size, "video/mp4", head)
+        elif re.fullmatch(r"/hls/([\w-]+)/\1\.m3u8", path):
+            self.__text(self.__m3u8(config), "application/vnd.apple.mpegurl", head)
+        elif match := re.fullmatch(r"/hls/[\w-]+/seg(\d+)\.ts", path):
+            self.__fragment(int(match[1]), "video/mp2t", head)
+        elif re.fullmatch(r"/dash/([\w-]+)/\1\.mpd", path):
+            self.__text(self.__mpd(config), "application/dash+xml", head)
+        elif re.fullmatch(r"/dash/[\w-]+/init\.mp4", path):
+            self.__payload(1024, "video/mp4", head)
+        elif match := re.fullmatch(r"/dash/[\w-]+/seg(\d+)\.m4s", path):
+            self.__fragment(int(match[1]) - 1, "video/iso.segment", head)
+        else:
+            self.send_error(404)
+
+    @staticmethod
+    def __m3u8(config: FakeMediaConfig) -> str:
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{config.fragment_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+        ]
+        for i in range(config.fragments):
+            lines += [f"#EXTINF:{config.fragment_duration}.0,", f"seg{i}.ts"]
+        lines.append("#EXT-X-ENDLIST")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def __mpd(config: FakeMediaConfig) -> str:
+        duration = config.fragments * config.fragment_duration
+        bandwidth = config.fragment_size * 8 // config.fragment_duration
+        return f"""<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" minBufferTime="PT2S"
+     mediaPresentationDuration="PT{duration}S" profiles="urn:mpeg:dash:profile:isoff-live:2011">
+  <Period>
+    <AdaptationSet mimeType="video/mp4" codecs="avc1.4d401f">
+      <Representation id="video" bandwidth="{bandwidth}" width="640" height="360">
+        <SegmentTemplate initialization="init.mp4" media="seg$Number$.m4s"
+                         startNumber="1" duration="{config.fragment_duration}" timescale="1"/>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+"""
+
+    def __fragment(self, index: int, content_type: str, head: bool) -> None:
+        if not 0 <= index < self.server.config.fragments:
+            self.send_error(404)
+            return
+        self.__payload(self.server.config.fragment_size, content_type, head)
+
+    def __text(self, text: str, content_type: str, head: bool) -> None:
+        body = text.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def __payload(self, size: int, content_type: str, head: bool) -> None:
+        if not head and self.server.should_fail():
+            self.send_error(503)
+            return
+        start, end = 0, size - 1
+        if match := re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", "")):
+            start = int(match[1] or 0)
+            end = min(int(match[2]), end) if match[2] else end
+            if start > end:
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        if head:
+            return
+        self.__send_bytes(end - start + 1)
+
+    def __send_bytes(self, length: int) -> None:
+        bandwidth = self.server.config.bandwidth
+        started = time.perf_counter()
+        sent = 0
+        try:
+            while sent < length:
+                n = min(_CHUNK, length - sent)
+                self.wfile.write(_PATTERN[:n])
+                sent += n
+                self.server.count(n)
+                if bandwidth:
+                    ahead = sent / bandwidth - (time.perf_counter() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            # client closed, e.g. generic extractor reads only the first bytes
+            self.close_connection = True
+
+
+class FakeMediaServer(ThreadingHTTPServer):
+    """serve synthetic media on localhost
+
+    Usage:
+        with FakeMediaServer(FakeMediaConfig(latency=0.05)) as server:
+            server.url("hls", "job0")  # http://127.0.0.1:<port>/hls/job0/job0.m3u8
+
+    <name> becomes the id of the media in the generic extractor,
+    so give each job a different name.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config: FakeMediaConfig | None = None, port: int = 0) -> None:
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.config: FakeMediaConfig = config if config is not None else FakeMediaConfig()
+        self.bytes_sent: int = 0
+        self.__random: random.Random = random.Random(self.config.seed)
+        self.__lock: threading.Lock = threading.Lock()
+        self.__thread: threading.Thread | None = None
+
+    def should_fail(self) -> bool:
+        if not self.config.error_rate:
+            return False
+        with self.__lock:
+            return self.__random.random() < self.config.error_rate
+
+    def count(self, n: int) -> None:
+        with self.__lock:
+            self.bytes_sent += n
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # clients close connections on purpose, e.g. generic extractor probes
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def url(self, kind: str, name: str) -> str:
+        return _url(self.server_address, kind, name)
+
+    def __enter__(self) -> "FakeMediaServer":
+        self.__thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def _url(address: tuple[Any, ...], kind: str, name: str) -> str:
+    host, port = address[:2]
+    path = {
+        "progressive": f"/progressive/{name}.mp4",
+        "hls": f"/hls/{name}/{name}.m3u8",
+        "dash": f"/dash/{name}/{name}.mpd",
+    }[kind]
+    return f"http://{host}:{port}{path}"
+
+
+def _serve(config: FakeMediaConfig, conn: Connection) -> None:
+    with FakeMediaServer(config) as server:
+        conn.send(server.server_address)
+        try:
+            conn.recv()
+        except EOFError:
+            pass
+
+
+class FakeMediaProcess():
+    """run FakeMediaServer in a child process
+
+    the server takes neither memory nor the GIL of the process under test.
+
+    Usage:
+        with FakeMediaProcess(FakeMediaConfig()) as server:
+            server.url("dash", "job0")
+    """
+
+    def __init__(self, config: FakeMediaConfig | None = None) -> None:
+        self.config: FakeMediaConfig = config if config is not None else FakeMediaConfig()
+        self.server_address: tuple[Any, ...] = ()
+        context = multiprocessing.get_context("spawn")
+        self.__conn, child_conn = context.Pipe()
+        self.__process = context.Process(
+            target=_serve, args=(self.config, child_conn), daemon=True
+        )
+
+    def url(self, kind: str, name: str) -> str:
+        return _url(self.server_address, kind, name)
+
+    def __enter__(self) -> "FakeMediaProcess":
+        self.__process.start()
+        self.server_address = self.__conn.recv()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.__conn.close()
+        self.__process.join(timeout=5)
+        if self.__process.is_alive():
+            self.__process.terminate()
@@ -0,0 +1,134 @@
+import io
+import os
+import shutil
+import threading
+import time
+import pytest
+from YYdlp_GUI.diskio import ALIGNMENT, CoalescingWriter, DeviceLimiter, DiskSpaceError, ensure_free_space, preallocate
+
+# diskio tests
+
+class FakeUsage:
+    def __init__(self, free):
+        self.free = free
+
+
+@pytest.fixture
+def free_space(monkeypatch):
+    def set_free(free):
+        monkeypatch.setattr(shutil, "disk_usage", lambda path: FakeUsage(free))
+    return set_free
+
+
+class RecordingFile(io.BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.sizes = []
+
+    def write(self, data):
+        self.sizes.append(len(data))
+        return super().write(data)
+
+
+class TestEnsureFreeSpace:
+    def test_enough(self, tmp_path, free_space):
+        free_space(1000)
+        ensure_free_space(str(tmp_path), 900, margin=100)
+        ensure_free_space(str(tmp_path), None)
+
+    def test_not_enough(self, tmp_path, free_space):
+        free_space(1000)
+        with pytest.raises(DiskSpaceError):
+            ensure_free_space(str(tmp_path), 901, margin=100)
+        with pytest.raises(DiskSpaceError):
+            ensure_free_space(str(tmp_path), 500, margin=100, reserved=401)
+
+    def test_missing_directory(self, tmp_path, free_space):
+        free_space(1000)
+        ensure_free_space(str(tmp_path / "not" / "yet"), 10, margin=0)
+
+
+class TestDeviceLimiter:
+    def test_reserve(self, tmp_path, free_space):
+        free_space(1000)
+        limiter = DeviceLimiter()
+        path = str(tmp_path)
+        with limiter.reserve(path, 600, margin=0) as reservation:
+            assert limiter.reserved(path) == 600
+            with pytest.raises(DiskSpaceError):
+                with limiter.reserve(path, 600, margin=0):
+                    pass
+            limiter.consume(reservation, 200)
+            assert reservation.remaining == 400
+            assert limiter.reserved(path) == 400
+            with limiter.reserve(path, 600, margin=0):
+                assert limiter.reserved(path) == 1000
+        assert limiter.reserved(path) == 0
+
+    def test_writers(self, tmp_path):
+        limiter = DeviceLimiter(max_writers=2)
+        device = os.stat(tmp_path).st_dev
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def write():
+            nonlocal running, peak
+            with limiter.writer(device):
+                with lock:
+                    running += 1
+                    peak = max(peak, running)
+                time.sleep(0.02)
+                with lock:
+                    running -= 1
+
+        threads = [threading.Thread(target=write) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert peak == 2
+
+
+class TestCoalescingWriter:
+    def test_coalesce(self):
+        file = RecordingFile()
+        writer = CoalescingWriter(file, buffer_size=ALIGNMENT * 4)
+        data = bytes(range(256)) * 200
+        for i in range(0, len(data), 100):
+            writer.write(data[i : i + 100])
+        writer.flush()
+        assert file.getvalue() == data
+        assert all(size % ALIGNMENT == 0 for size in file.sizes[:-1])
+        assert min(file.sizes[:-1]) >= ALIGNMENT * 4
+
+    def test_append_alignment(self):
+        file = RecordingFile()
+        file.write(b"x" * 1000)
+        file.sizes.clear()
+        writer = CoalescingWriter(file, buffer_size=ALIGNMENT)
+        writer.write(b"y" * ALIGNMENT * 2)
+        assert (1000 + file.sizes[0]) % ALIGNMENT == 0
+
+    def test_reservation(self, tmp_path, free_space):
+        free_space(1 << 30)
+        limiter = DeviceLimiter()
+        path = tmp_path / "media.part"
+        with limiter.reserve(str(tmp_path), 3 * ALIGNMENT, margin=0) as reservation:
+            with CoalescingWriter(
+                open(path, "wb"), buffer_size=ALIGNMENT, limiter=limiter, reservation=reservation
+            ) as writer:
+                writer.write(b"z" * ALIGNMENT * 2)
+                assert reservation.remaining == ALIGNMENT
+        assert limiter.reserved(str(tmp_path)) == 0
+        assert path.read_bytes() == b"z" * ALIGNMENT * 2
+
+    def test_preallocate(self, tmp_path):
+        path = tmp_path / "media.part"
+        with open(path, "wb") as file:
+            if preallocate(file, 1 << 20):
+                # the size is kept for resuming .part files
+                assert os.fstat(file.fileno()).st_size == 0
+        with CoalescingWriter(open(path, "wb"), size_hint=1 << 20) as writer:
+            writer.write(b"a" * 5000)
+        assert path.read_bytes() == b"a" * 5000
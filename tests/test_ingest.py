@@ -0,0 +1,104 @@
+import pytest
+from YYdlp_GUI.ingest import ExtractorMatcher, IngestResult, UrlIngestor, normalize_url
+
+# ingest.normalize_url tests
+
+@pytest.mark.parametrize(
+("line", "url"),
+[
+    ("https://www.youtube.com/watch?v=abc", "https://www.youtube.com/watch?v=abc"),
+    ("  <HTTPS://WWW.YouTube.com:443/watch?v=abc#t=1>  ", "https://www.youtube.com/watch?v=abc"),
+    ("youtu.be/abc", "https://youtu.be/abc"),
+    ("https://example.com/a?utm_source=x&id=1&fbclid=y", "https://example.com/a?id=1"),
+    ("https://www.youtube.com/#/watch?v=BaW_jenozKc", "https://www.youtube.com/#/watch?v=BaW_jenozKc"),
+    ("https://www.youtube.com/watch#!v=BaW_jenozKc", "https://www.youtube.com/watch#!v=BaW_jenozKc"),
+    ("https://example.com/a#t=1m30s", "https://example.com/a"),
+    ("https://example.com/a#", "https://example.com/a"),
+    ("http://127.0.0.1:8080/a.mp4", "http://127.0.0.1:8080/a.mp4"),
+    ("http://[::1]/a", "http://[::1]/a"),
+    ("ftp://example.com/a", None),
+    ("# comment", None),
+    ("not a url", None),
+    ("", None),
+],
+)
+def test_normalize_url(line, url):
+    assert normalize_url(line) == url
+
+
+# ingest.UrlIngestor tests
+
+class FakeMatcher(ExtractorMatcher):
+    """match urls under /media/ without loading yt-dlp extractors"""
+
+    def __init__(self):
+        super().__init__()
+        self.matched = []
+
+    def match(self, url):
+        self.matched.append(url)
+        return "Fake" if "/media/" in url else None
+
+
+class TestUrlIngestor:
+    def fixture_1(self, **kwargs):
+        self.enqueued = []
+        self.batches = []
+        self.matcher = FakeMatcher()
+        self.ingestor = UrlIngestor(
+            enqueue=self.enqueued.append,
+            on_batch=self.batches.append,
+            matcher=self.matcher,
+            **kwargs,
+        )
+
+    def test_accept(self):
+        self.fixture_1()
+        total = self.ingestor.ingest_text(
+            "example.com/media/a\nhttps://example.com/page\nnot a url\n# comment\n"
+        ).result(timeout=10)
+        self.ingestor.shutdown()
+        assert total == IngestResult(
+            accepted=[("https://example.com/media/a", "Fake")], unsupported=2, done=True
+        )
+        assert self.enqueued == [[("https://example.com/media/a", "Fake")]]
+
+    def test_dedup(self):
+        self.fixture_1(batch_size=2)
+        first = self.ingestor.ingest(
+            ["https://example.com/media/a", "https://example.com/media/b",
+             "https://example.com/media/a?utm_source=x", "https://example.com/media/c"]
+        ).result(timeout=10)
+        second = self.ingestor.ingest(
+            ["https://example.com/media/b", "https://example.com/media/d"]
+        ).result(timeout=10)
+        self.ingestor.shutdown()
+        assert (len(first.accepted), first.duplicates) == (3, 1)
+        assert (len(second.accepted), second.duplicates) == (1, 1)
+        # each url is matched once
+        assert len(self.matcher.matched) == 4
+
+    def test_known(self):
+        known = {"https://example.com/media/a"}
+        self.fixture_1(known=known)
+        result = self.ingestor.ingest(
+            ["https://example.com/media/a", "https://example.com/media/a"]
+        ).result(timeout=10)
+        known.clear()
+        # urls released by known, e.g. failed downloads, are accepted again
+        retried = self.ingestor.ingest(["https://example.com/media/a"]).result(timeout=10)
+        self.ingestor.shutdown()
+        assert (result.accepted, result.duplicates) == ([], 2)
+        assert retried.accepted == [("https://example.com/media/a", "Fake")]
+
+    def test_batches(self):
+        self.fixture_1(batch_size=3, max_workers=2)
+        urls = [f"https://example.com/media/{i}" for i in range(7)]
+        total = self.ingestor.ingest(urls).result(timeout=10)
+        self.ingestor.shutdown()
+        assert [len(batch) for batch in self.enqueued] == [3, 3, 1]
+        assert [len(batch.accepted) for batch in self.batches] == [3, 3, 1]
+        assert [url for url, _ in total.accepted] == urls
+
+    def test_generic(self):
+        assert ExtractorMatcher().allow_generic is False
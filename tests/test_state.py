@@ -1,6 +1,6 @@
 from typing import Any # noqa F401
 import pytest
-from YYdlp_GUI.state import RedundancyError, EssentialError, State, ReactiveState # noqa F401
+from YYdlp_GUI.state import RedundancyError, EssentialError, CycleError, State, ReactiveState, Store, StoreTemplate, Change, compile_graph # noqa F401
 
 # state.State tests
 
@@ -172,4 +172,226 @@ class TestStore:
             store.get("state_3")
             assert isinstance(err.value,KeyError)
 
-    
\ No newline at end of file
+    
+
+# state.Store change-set tests
+class TestStoreChangeSet:
+    def subscriber(self, changes):
+        self.change_sets.append(changes)
+
+    def fixture_1(self):
+        self.change_sets = []
+        self.store = Store(
+            name="job",
+            states=(("progress", 0), ("title", "")),
+            reactives=(("label", lambda p: f"{p}%", ("progress",), ()),),
+        )
+
+    def test_diff(self):
+        self.fixture_1()
+        store = self.store
+        store.subscribe(self.subscriber)
+        store.set(("progress",), 50)
+        assert self.change_sets == [
+            (Change("progress", 0, 50), Change("label", "0%", "50%"))
+        ] or self.change_sets == [
+            (Change("label", "0%", "50%"), Change("progress", 0, 50))
+        ]
+
+    def test_batch_coalesce(self):
+        self.fixture_1()
+        store = self.store
+        store.subscribe(self.subscriber, prefix="progress")
+        with store.batch():
+            store.set(("progress",), 10)
+            store.set(("progress",), 20)
+            store.set(("title",), "new")
+        assert self.change_sets == [(Change("progress", 0, 20),)]
+        with store.batch():
+            store.set(("progress",), 30)
+            store.set(("progress",), 20)
+        assert len(self.change_sets) == 1
+
+    def test_nested(self):
+        self.fixture_1()
+        store = self.store
+        sub = store.store("format", states=(("ext", "mp4"),))
+        store.subscribe(self.subscriber, prefix="format.")
+        sub.set(("ext",), "webm")
+        assert self.change_sets == [(Change("format.ext", "mp4", "webm"),)]
+        store.drop_store("format")
+        sub.set(("ext",), "mkv")
+        assert len(self.change_sets) == 1
+
+    def test_prefix_segments(self):
+        self.fixture_1()
+        store = self.store
+        job1 = store.store("job1", states=(("progress", 0),))
+        job10 = store.store("job10", states=(("progress", 0),))
+        store.subscribe(self.subscriber, prefix="job1")
+        job10.set(("progress",), 50)
+        assert self.change_sets == []
+        job1.set(("progress",), 50)
+        assert self.change_sets == [(Change("job1.progress", 0, 50),)]
+
+    def test_redundancy_subscribe(self):
+        self.fixture_1()
+        self.store.subscribe(self.subscriber)
+        with pytest.raises(RedundancyError):
+            self.store.subscribe(self.subscriber)
+
+
+# state.Store.freeze / compile_graph tests
+class TestCompiledGraph:
+    def test_topological_order(self):
+        graph = compile_graph(
+            states=(("a", 1), ("b", 2)),
+            reactives=(
+                ("d", lambda c, a: c * a, ("c", "a"), ()),
+                ("c", lambda a, b: a + b, ("a", "b"), ()),
+            ),
+        )
+        assert graph.keys == ("a", "b", "c", "d")
+        assert graph.fanout[graph.index["b"]] == (2, 3)
+        assert graph.reliances[graph.index["d"]] == (2, 0)
+
+    def test_cycle(self):
+        with pytest.raises(CycleError) as error:
+            compile_graph(
+                states=(("a", 1),),
+                reactives=(
+                    ("b", lambda a, c: a, ("a", "c"), ()),
+                    ("c", lambda b: b, ("b",), ()),
+                ),
+            )
+        assert set(error.value.target) == {"b", "c"}
+
+    def test_dead_nodes(self):
+        graph = compile_graph(
+            states=(("a", 1),),
+            reactives=(
+                ("b", lambda a: a, ("a",), ()),
+                ("c", lambda b: b, ("b",), ()),
+                ("d", lambda a: a, ("a",), ()),
+            ),
+            observed={"c"},
+        )
+        b, c, d = (graph.index[key] for key in "bcd")
+        assert graph.live[b] and graph.live[c] and not graph.live[d]
+        assert graph.fanout[graph.index["a"]] == tuple(sorted((b, c)))
+        assert graph.refresh[d] == (d,)
+
+    def test_freeze(self):
+        store = Store(
+            name="job",
+            states=(("downloaded", 0), ("total", 100)),
+            reactives=(
+                ("progress", lambda d, t: d * 100 // t, ("downloaded", "total"), ()),
+                ("label", lambda p: f"{p}%", ("progress",), ()),
+                ("unused", lambda d: -d, ("downloaded",), ()),
+            ),
+        )
+        labels = []
+        store.bind_states(("label",), (labels.append,))
+        graph = store.freeze()
+        assert graph.live[graph.index["unused"]] is False
+        store.set(("downloaded",), 50)
+        assert labels == ["50%"]
+        assert store.get("unused") == -50
+        store.thaw()
+        store.set(("downloaded",), 25)
+        assert labels == ["50%", "25%"]
+        assert store.get("unused") == -25
+
+
+# state.StoreTemplate tests
+class TestStoreTemplate:
+    def fixture_1(self, observed=None):
+        self.template = StoreTemplate(
+            name="job",
+            states=(("downloaded", 0), ("total", 100)),
+            state_keys=("title",),
+            reactives=(
+                ("label", lambda p: f"{p}%", ("progress",), ()),
+                ("progress", lambda d, t: d * 100 // t, ("downloaded", "total"), ()),
+            ),
+            observed=observed,
+        )
+
+    def test_instantiate(self):
+        self.fixture_1()
+        job0 = self.template.instantiate("job0")
+        job1 = self.template.instantiate("job1")
+        assert job0.get_dict(("title", "progress", "label")) == {
+            "title": None,
+            "progress": 0,
+            "label": "0%",
+        }
+        labels = []
+        job0.bind_states(("label",), (labels.append,))
+        job0.set(("downloaded",), 50)
+        assert labels == ["50%"]
+        assert job1.get("label") == "0%"
+        assert not hasattr(job0, "__dict__")
+        with pytest.raises(TypeError):
+            job0.set(("label",), "100%")
+
+    def test_dead_nodes(self):
+        self.fixture_1(observed={"progress"})
+        job = self.template.instantiate("job")
+        with pytest.raises(KeyError):
+            job.bind_states(("label",), (print,))
+        job.set(("downloaded",), 20)
+        assert job.get("label") == "20%"
+
+    def test_nested(self):
+        self.fixture_1()
+        change_sets = []
+        root = Store(name="jobs")
+        root.subscribe(change_sets.append)
+        job = root.store_from(self.template, "job0")
+        job.set(("downloaded",), 10)
+        assert set(change_sets[0]) == {
+            Change("job0.downloaded", 0, 10),
+            Change("job0.progress", 0, 10),
+            Change("job0.label", "0%", "10%"),
+        }
+
+    def test_prefix_segments(self):
+        self.fixture_1()
+        change_sets = []
+        partial_sets = []
+        job = self.template.instantiate("job")
+        job.subscribe(change_sets.append, prefix="label")
+        job.subscribe(partial_sets.append, prefix="progres")
+        job.set(("downloaded",), 10)
+        assert change_sets == [(Change("label", "0%", "10%"),)]
+        assert partial_sets == []
+
+    def test_child_of_store(self):
+        self.fixture_1()
+        root = Store(name="jobs")
+        job = root.store_from(self.template, "job0")
+        bound = []
+        dropped = []
+        root.bind_store(("job0",), (bound.append,))
+        job.set(("downloaded",), 10)
+        assert bound == [job]
+        root.unbind_store(("job0",))
+        job.set(("downloaded",), 20)
+        assert bound == [job]
+        root.on_drop(("job0",), (lambda: dropped.append("job0"),))
+        root.drop_store("job0")
+        bound.clear()
+        del job
+        assert dropped == ["job0"]
+
+    def test_unsubscribe_without_subscribe(self):
+        self.fixture_1()
+        job = self.template.instantiate("job")
+        with pytest.raises(KeyError):
+            job.unsubscribe(print)
+
+    def test_external_reliance(self):
+        with pytest.raises(EssentialError):
+            StoreTemplate(name="job", reactives=(("r", lambda x: x, (), (State(0),)),))
@@ -0,0 +1,176 @@
+import os
+import shutil
+import threading
+import time
+import pytest
+from yt_dlp import postprocessor
+from yt_dlp.postprocessor.common import PostProcessor
+from YYdlp_GUI.diskio import SPACE_MARGIN, DiskSpaceError
+from YYdlp_GUI.yt_dlp_wrapper import MediaDownLoad, MediaInfo, PostProcessPool, YoutubeDLPool
+
+from .fake_media_server import FakeMediaConfig, FakeMediaServer
+
+# yt_dlp_wrapper tests
+
+OPTS = {"quiet": True, "noprogress": True}
+
+
+class SlowPP(PostProcessor):
+    def run(self, info):
+        time.sleep(0.2)
+        filepath = info["filepath"] + ".done"
+        os.rename(info["filepath"], filepath)
+        info["filepath"] = filepath
+        return [], info
+
+
+class GatedPP(PostProcessor):
+    started = threading.Event()
+    finish = threading.Event()
+
+    def run(self, info):
+        GatedPP.started.set()
+        GatedPP.finish.wait(timeout=60)
+        return [], info
+
+
+class FakeUsage:
+    def __init__(self, free):
+        self.free = free
+
+
+class FakeSession:
+    def __init__(self, opts):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def server():
+    with FakeMediaServer(FakeMediaConfig(file_size=64 << 10)) as server:
+        yield server
+
+
+class TestMediaDownLoad:
+    def test_download(self, server, tmp_path):
+        downloader = MediaDownLoad(str(tmp_path), ydl_opts=OPTS)
+        url = server.url("progressive", "media")
+        info = downloader.download(url).result(timeout=60)
+        downloader.shutdown()
+        assert os.path.getsize(info["requested_downloads"][0]["filepath"]) == 64 << 10
+
+    def test_ie_key_and_failure(self, server, tmp_path):
+        downloader = MediaDownLoad(str(tmp_path), ydl_opts=OPTS)
+        url = server.url("progressive", "media")
+        # the extractor matched by UrlIngestor is used as is
+        downloader.download_many([(url, "Generic")])[0].result(timeout=60)
+        failed = downloader.download("http://127.0.0.1:1/missing.mp4")
+        assert failed.exception(timeout=60) is not None
+        downloader.shutdown()
+        assert url in downloader
+        # failed urls can be queued again
+        assert "http://127.0.0.1:1/missing.mp4" not in downloader
+        with pytest.raises(RuntimeError):
+            downloader.download(server.url("progressive", "late"))
+        assert server.url("progressive", "late") not in downloader
+
+    def test_postprocess_after_download(self, server, tmp_path, monkeypatch):
+        monkeypatch.setitem(postprocessor.postprocessors.value, "SlowPP", SlowPP)
+        hooked = []
+        downloader = MediaDownLoad(
+            str(tmp_path),
+            max_workers=2,
+            ydl_opts={
+                **OPTS,
+                "postprocessors": [{"key": "Slow"}],
+                "post_hooks": [lambda path: hooked.append((path, threading.current_thread().name))],
+            },
+        )
+        futures = [downloader.download(server.url("progressive", f"pp{i}")) for i in range(3)]
+        filepaths = [future.result(timeout=60)["requested_downloads"][0]["filepath"] for future in futures]
+        downloader.shutdown()
+        assert all(filepath.endswith(".done") for filepath in filepaths)
+        # post hooks see the post-processed file, on a post-process worker
+        assert sorted(path for path, _ in hooked) == sorted(filepaths)
+        assert all(name.startswith("PostProcessPool") for _, name in hooked)
+
+    def test_merge_space_held(self, server, tmp_path, monkeypatch):
+        monkeypatch.setitem(postprocessor.postprocessors.value, "GatedPP", GatedPP)
+        merge_size = 100 << 20
+        # the muxed file of one job fits, not two
+        free = SPACE_MARGIN + merge_size * 3 // 2
+        monkeypatch.setattr(shutil, "disk_usage", lambda path: FakeUsage(free))
+        monkeypatch.setattr(MediaInfo, "merge_size", lambda self: merge_size)
+        GatedPP.started.clear()
+        GatedPP.finish.clear()
+        downloader = MediaDownLoad(
+            str(tmp_path), ydl_opts={**OPTS, "postprocessors": [{"key": "Gated"}]}
+        )
+        merging = downloader.download(server.url("progressive", "merge0"))
+        assert GatedPP.started.wait(timeout=60)
+        with pytest.raises(DiskSpaceError):
+            downloader.download(server.url("progressive", "merge1")).result(timeout=60)
+        GatedPP.finish.set()
+        merging.result(timeout=60)
+        # released when the post-processing is done
+        downloader.download(server.url("progressive", "merge2")).result(timeout=60)
+        downloader.shutdown()
+
+    def test_shutdown_cancels_queued(self, server, tmp_path):
+        downloader = MediaDownLoad(str(tmp_path), max_workers=1, ydl_opts=OPTS)
+        futures = [downloader.download(server.url("progressive", f"job{i}")) for i in range(4)]
+        downloader.shutdown(wait=False)
+        for future in futures:
+            if not future.cancelled():
+                future.exception(timeout=60)
+        assert all(future.done() for future in futures)
+        assert sum(future.cancelled() for future in futures) >= 3
+
+    def test_postprocess_pool_closed(self):
+        pool = PostProcessPool(lambda: None, max_workers=1)
+        pool.shutdown()
+        with pytest.raises(RuntimeError):
+            pool.submit(lambda ydl: None)
+
+
+class TestYoutubeDLPool:
+    def test_reuse(self):
+        pool = YoutubeDLPool(factory=FakeSession)
+        with pool.session() as first:
+            pass
+        with pool.session() as second:
+            assert second is first
+
+    def test_keep_alive(self, tmp_path, monkeypatch):
+        connections = []
+        config = FakeMediaConfig(fragment_size=16 << 10, fragments=4)
+        with FakeMediaServer(config) as server:
+            process_request = server.process_request
+
+            def count(request, address):
+                connections.append(address)
+                process_request(request, address)
+
+            monkeypatch.setattr(server, "process_request", count)
+            downloader = MediaDownLoad(str(tmp_path), max_workers=1, ydl_opts=OPTS)
+            for i in range(3):
+                downloader.download(server.url("hls", f"alive{i}")).result(timeout=60)
+            downloader.shutdown()
+        # playlists and fragments of all jobs share connections of one session.
+        # the generic extractor leaves one response of each job unread
+        assert len(connections) <= 3 + 1
+
+    def test_close(self):
+        pool = YoutubeDLPool(factory=FakeSession)
+        with pool.session() as borrowed:
+            with pool.session() as idle:
+                pass
+            pool.close()
+            assert idle.closed
+            assert not borrowed.closed
+        assert borrowed.closed
+        with pytest.raises(RuntimeError):
+            with pool.session():
+                pass